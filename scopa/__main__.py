@@ -1,48 +1,36 @@
-import random
+import argparse
 import os
+import shlex
 from typing import List, Dict, Tuple, Callable
 
 import pygame
 
+from scopa.ai import Wary, decide_option
+from scopa.captures import clear_index
+from scopa.cardset import CardSet, EMPTY, bit, card_index, card_tuple, count, indices, to_string
+from scopa.engine import GameState, START_DECK_VALUES, deal, find_winner, legal_moves, new_seed, seeded_deck, step
+from scopa.fonts import LRUCache, render_text
+from scopa.ismcts import ISMCTS
+from scopa.layout import LOGICAL_HEIGHT, LOGICAL_WIDTH, Layout, fit_window, parse_size
+from scopa.profiler import FrameProfiler
+from scopa.protocol import EngineStrategy
+from scopa.record import GameRecord, parse_seed, write_record
+from scopa.render import Renderer, PILE_LAYER, HAND_LAYER, MOVING_LAYER, DRAGGING_LAYER, BUTTON_LAYER, OVERLAY_LAYER
+from scopa.textures import drop_textures, get_texture, get_back_texture, preload_textures
+from scopa.tween import Tweener
+from scopa.worker import AIWorker
+
 # Margins
 MARGIN_LEFT = 230
 MARGIN_TOP = 150
 
 # WINDOW SIZE
-# WIDTH = 1600
-# HEIGHT = 1000
-WIDTH = 1680
-HEIGHT = 1050
-
-
-# Card sizes
-CARD_WIDTH = 100
-CARD_HEIGHT = 160
-
-# Hand placements
-LOWER_HAND_HEIGHT = 5*HEIGHT/6
-UPPER_HAND_HEIGHT = HEIGHT/6
-HAND_LEFT_3 = 5*WIDTH/12
-HAND_RIGHT_3 = 7*WIDTH/12
-HAND_MIDDLE = WIDTH/2
-HAND_LEFT_2 = 11*WIDTH/24
-HAND_RIGHT_2 = 13*WIDTH/24
-CENTRE_HAND_HEIGHT = HEIGHT/2
-CENTRE_HAND_RIGHT_MARGIN = WIDTH - CARD_WIDTH*1.5
-DECK_y = HEIGHT/2
-DECK_x = CARD_WIDTH*1.1
-UPPER_WON_HEIGHT = HEIGHT/3 - CARD_HEIGHT
-WON_WIDTH = CENTRE_HAND_RIGHT_MARGIN
-LOWER_WON_HEIGHT = 2*HEIGHT/3 + CARD_HEIGHT
-
-CENTRE_UPPER_BOUND = HEIGHT/3 - CARD_HEIGHT/2
-CENTRE_LOWER_BOUND = 2*HEIGHT/3 + CARD_HEIGHT/2
-
-# Button Constants
-BUTTON_WIDTH = 3*CARD_WIDTH
-BUTTON_HEIGHT = CARD_HEIGHT/2
-
+# The default, shrunk to fit smaller screens. Positions and sizes for the actual window are in Layout.
+WIDTH = LOGICAL_WIDTH
+HEIGHT = LOGICAL_HEIGHT
 
+# Share of the screen the default window may take up, leaving room for title and task bars.
+SCREEN_FILL = 0.9
 
 # COLORS
 BLACK = (0, 0, 0)
@@ -55,31 +43,20 @@ LIGHT_RED = (120, 0, 0)
 
 fileloc = os.path.dirname(__file__)
 
-IMAGE_PATH = os.path.join(fileloc, "resources/images/")
-BACK_IMAGE_PATH = os.path.join(fileloc, "resources/images/Dummy/Dummy_Dummy.jpg")
 ICON_PATH = os.path.join(fileloc, "resources/italy.png")
 
-SUITS = ("Coins", "Clubs", "Cups", "Swords",)
-VALUES = range(1, 11)
-
-START_DECK_VALUES = [
-    (suit, value)
-    for suit in SUITS
-    for value in VALUES
-]
+# Animation lengths in seconds, deals start DEAL_STAGGER apart and fly together.
+DEAL_TIME = 0.5
+MOVE_TIME = 1.0
+DEAL_STAGGER = 0.1
 
-DEAL_INTERVAL = 30
-MOVE_INTERVAL = 60
-
-PLACEMENT_DICT = {
-    0: HAND_RIGHT_3,
-    1: HAND_MIDDLE,
-    2: HAND_LEFT_3,
-}
+FPS = 60
 
-NAPOLA_CARDS = [(1, "Coins"), (2, "Coins"), (3, "Coins")]
+# Option button surfaces kept. Each is a few hundred KB on a big screen, and a turn rarely has more than a handful.
+BUTTON_CACHE_LIMIT = 64
 
-FPS = 60
+# How long to block for input before checking in again when nothing is animating, in ms.
+IDLE_TIMEOUT = 500
 
 FAKE_VALUES = [
     ("Coins", 2),
@@ -97,18 +74,17 @@ FAKE_VALUES = [
 ]
 
 
-class Card(pygame.sprite.Sprite):
-    def __init__(self, suit, value, position):
+class Card(pygame.sprite.DirtySprite):
+    def __init__(self, suit, value, position, size: Tuple[int, int]):
         super().__init__()
         self.suit = suit
         self.value = value
         self.position = position
-        self._image = pygame.image.load(os.path.join(IMAGE_PATH, f"{self.suit}/{self.value}_{self.suit}.jpg")).convert()
-        self._base_image = pygame.transform.scale(self._image, (CARD_WIDTH, CARD_HEIGHT))
-        self._back_image = pygame.image.load(BACK_IMAGE_PATH).convert()
-        self._base_back_image = pygame.transform.scale(self._back_image, (CARD_WIDTH, CARD_HEIGHT))
-        self.image = self._base_image.copy()
-        self.back_image = self._base_back_image.copy()
+        self.size = size
+        # Surfaces are shared between all cards, never draw onto them.
+        self.face_image = get_texture(suit, value, size)
+        self.back_image = get_back_texture(size)
+        self.image = self.face_image
         self.rect = self.image.get_rect()
         self.rect.center = position
         self.offset_x = 0
@@ -121,113 +97,164 @@ class Card(pygame.sprite.Sprite):
     def __repr__(self) -> str:
         return f"{self.value} of {self.suit}"
 
-    def __eq__(self, other) -> bool:
-        return self.suit == other.suit and self.value == other.value
-
-    def __hash__(self) -> int:
-        return hash(self.value) * hash(self.suit)
-
     def string(self) -> str:
         return self.__repr__()
 
     def tuple(self) -> Tuple[int, str]:
         return self.value, self.suit
 
+    def index(self) -> int:
+        return card_index(self.value, self.suit)
+
     def draw(self, screen: pygame.Surface, x, y):
         screen.blit(self.image, (x, y))
 
     def set_position(self, x, y):
         self.rect.center = (x, y)
+        self.dirty = 1
         if not self.dragging:
             self.initial_x = x
             self.initial_y = y
 
     def flip(self):
+        self.dirty = 1
         if self.showing:
-            self.image = self.back_image.copy()
+            self.image = self.back_image
             self.showing = False
         else:
-            self.image = self._base_image.copy()
+            self.image = self.face_image
             self.showing = True
 
+    def reset(self, position, size: Tuple[int, int]):
+        # Back to how a new card starts, so the sprites can be dealt again next game.
+        self.dragging = False
+        if not self.showing:
+            self.flip()
+        if size != self.size:
+            self.set_size(size)
+        self.set_position(*position)
+
+    def set_size(self, size: Tuple[int, int]):
+        # Keeps the centre where it is.
+        self.size = size
+        self.face_image = get_texture(self.suit, self.value, size)
+        self.back_image = get_back_texture(size)
+        self.image = self.face_image if self.showing else self.back_image
+        self.rect = self.image.get_rect(center=self.rect.center)
+        self.dirty = 1
+
 
 class Controller:
-    def __init__(self, screen):
+    def __init__(self, screen, strategy: Callable = decide_option, speed: float = 1.0, think_time: float = None,
+                 profiler: FrameProfiler = None, seed: int = None, players: Tuple[str, str] = ("human", "greedy"),
+                 record_path: str = None):
         self.screen = screen
         self.clock = pygame.time.Clock()
-        self.deck_values = random.sample(START_DECK_VALUES, 40)
 
-        # These lists hold the cards for each object player.
-        self.lower_cards: List[Card] = list()
-        self.upper_cards: List[Card] = list()
-        self.centre_cards: List[Card] = list()
-        self.lower_won_cards: List[Card] = list()
-        self.upper_won_cards: List[Card] = list()
-        self.holder: List[Card] = list()
+        # Where everything goes for the current window size, see resize.
+        self.layout = Layout(*screen.get_size())
+        self.resize_to = None
+
+        # Times each frame, F3 shows the overlay and F4 records a cProfile.
+        self.profiler = profiler if profiler is not None else FrameProfiler()
+
+        # The rules live in the engine, everything here is for drawing it.
+        self.seed = seed if seed is not None else new_seed()
+        self.state = GameState(seeded_deck(self.seed))
+        self.strategy = strategy
+
+        # Every action is recorded, and the game written to record_path if given, see scopa.replay.
+        self.players = players
+        self.record = GameRecord(self.seed, self.state.deck, players)
+        self.record_path = record_path
+
+        # The computer thinks on its own thread, for at most think_time ms if given.
+        self.worker = AIWorker(strategy)
+        self.think_time = think_time
+
+        # These sets hold the cards for each object player, as they are drawn.
+        # They catch up with the state once the animations finish.
+        self.lower_cards: CardSet = EMPTY
+        self.upper_cards: CardSet = EMPTY
+        self.centre_cards: CardSet = EMPTY
+        self.lower_won_cards: CardSet = EMPTY
+        self.upper_won_cards: CardSet = EMPTY
+        self.holder: CardSet = EMPTY
 
-        # These this ares for the computer
-        self.chosen_card: Card = None
-        self.chosen_option: List[Card] = None
-        self.centre_updated = False
+        # Card sprites by card index, created as they are dealt.
+        self.cards: Dict[int, Card] = dict()
+
+        # Engine events waiting to be animated.
+        self.events = deal(self.state)
+        self.worker.observe(self.events)
 
         # List of buttons if buttons are present, used for drawing.
         self.buttons: List[OptionButton] = list()
 
-        # Used for animating the cards as part of draw loop.
-        # Of the form: Card, placement, incrementx, incrementy .
-        # Will increment the position of the card each frame.
-        self.dealables: List[(Card, str, int, int)] = list()
-        self.moveables: List[(Card, str, int, int)] = list()
+        # Moves the cards that are being dealt or played, cards in flight are in no hand until they land.
+        self.tweener = Tweener(speed)
 
         # Cannot set defaults for these, needs screen to be created first.
-        self.deck_card = Card("Dummy", "Dummy", (DECK_x, DECK_y))
-        self.upper_won_card = Card("Dummy", "Dummy", (WON_WIDTH, UPPER_WON_HEIGHT))
-        self.lower_won_card = Card("Dummy", "Dummy", (WON_WIDTH, LOWER_WON_HEIGHT))
-
-        self.pointer = 0
-        self.player_1_turn = True
-        self.player_last_won = False
-        self.lower_points = 0
-        self.upper_points = 0
-        self.dealing = True
-        self.first_deal = True
+        layout = self.layout
+        self.deck_card = Card("Dummy", "Dummy", (layout.deck_x, layout.deck_y), layout.card_size())
+        self.upper_won_card = Card("Dummy", "Dummy", (layout.won_width, layout.upper_won_height), layout.card_size())
+        self.lower_won_card = Card("Dummy", "Dummy", (layout.won_width, layout.lower_won_height), layout.card_size())
+
+        # Only redraws the parts of the screen that changed.
+        self.renderer = Renderer(screen, get_background(layout))
+
         self.wait_for_button = False
-        self.empty = False
         self.game_running = True
         self.restart = False
         self.quit = False
 
 
-class Button(pygame.sprite.Sprite):
-    def __init__(self, x, y, text: str, w=BUTTON_WIDTH, h=BUTTON_HEIGHT):
+# Button surfaces by (text, width, height, font size), each is only drawn once per window size.
+_BUTTON_IMAGES = LRUCache(BUTTON_CACHE_LIMIT)
+
+
+def button_images(text: str, w: int, h: int, font_size: int) -> Tuple[pygame.Surface, pygame.Surface]:
+    key = (text, w, h, font_size)
+    images = _BUTTON_IMAGES.get(key)
+    if images is None:
+        text_surf = render_text(text, font_size, WHITE)
+        button_image = pygame.Surface((w, h))
+        button_image.fill(BLACK)
+        button_image.blit(text_surf, text_surf.get_rect(center=(w // 2, h // 2)))
+        hover_image = pygame.Surface((w, h))
+        hover_image.fill(GRAY)
+        hover_image.blit(text_surf, text_surf.get_rect(center=(w // 2, h // 2)))
+        pygame.draw.rect(hover_image, (96, 196, 96), hover_image.get_rect(), 3)
+        images = (button_image, hover_image)
+        _BUTTON_IMAGES.put(key, images)
+    return images
+
+
+class Button(pygame.sprite.DirtySprite):
+    def __init__(self, x, y, text: str, layout: Layout):
         super().__init__()
-        self.font = pygame.font.SysFont(None, 25)
         self.text = text
-        text_surf = self.font.render(self.text, True, WHITE)
-        self.button_image = pygame.Surface((w, h))
-        self.button_image.fill(BLACK)
-        self.button_image.blit(text_surf, text_surf.get_rect(center=(w // 2, h // 2)))
-        self.hover_image = pygame.Surface((w, h))
-        self.hover_image.fill(GRAY)
-        self.hover_image.blit(text_surf, text_surf.get_rect(center=(w // 2, h // 2)))
-        pygame.draw.rect(self.hover_image, (96, 196, 96), self.hover_image.get_rect(), 3)
+        w = int(layout.button_width)
+        h = int(layout.button_height)
+        self.button_image, self.hover_image = button_images(text, w, h, layout.font_size(25))
         self.image = self.button_image
         self.rect = pygame.Rect(x, y, w, h)
 
     def set_position(self, x, y):
         self.rect.center = (x, y)
+        self.dirty = 1
 
     def draw(self, screen):
         screen.blit(self.image, (self.rect.x, self.rect.y))
 
 
 class OptionButton(Button):
-    def __init__(self, x, y, initial_card: Card, option: List[Card], scopa: bool = False):
+    def __init__(self, x, y, initial_card: Card, option: CardSet, layout: Layout, scopa: bool = False):
         self.initial_card = initial_card
         self.option = option
-        self.text = ', '.join([card.string() for card in self.option])
+        self.text = to_string(self.option)
         self.scopa = scopa
-        super().__init__(x, y, text=self.text)
+        super().__init__(x, y, self.text, layout)
 
 
 
@@ -242,214 +269,277 @@ def _build():
     pygame.display.set_icon(icon)
 
 
-def get_board() -> pygame.Surface:
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+def get_board(size: Tuple[int, int] = (WIDTH, HEIGHT)) -> pygame.Surface:
+    screen = pygame.display.set_mode(size, pygame.RESIZABLE)
     screen.fill(GREEN)
+    layout = Layout(*screen.get_size())
+    # Shown until the first frame of the game, cards only wait for their own texture as they are made.
+    if preload_textures(START_DECK_VALUES, layout.card_size(), background=True) is not None:
+        draw_loading(screen, layout)
     return screen
 
 
-def draw_hand(hand: List[Card], screen: pygame.Surface) -> None:
-    for card in hand:
-        card.draw(screen, card.rect.x, card.rect.y)
+def window_size(args: argparse.Namespace) -> Tuple[int, int]:
+    if args.size is not None:
+        return args.size
+    desktops = pygame.display.get_desktop_sizes()
+    if not desktops:
+        return WIDTH, HEIGHT
+    desktop_width, desktop_height = desktops[0]
+    return fit_window(WIDTH, HEIGHT, int(desktop_width * SCREEN_FILL), int(desktop_height * SCREEN_FILL))
 
 
-def draw_hands(controller: Controller) -> None:
-    dealing_hand = list()
-    moving_hand = list()
-    holder_hand = [card for card in controller.holder]
-    if controller.moveables:
-        moving_hand = [moveable[0] for moveable in controller.moveables]
-    elif controller.dealables:
-        dealing_card, _, _, _ = controller.dealables[0]
-        dealing_hand = [dealing_card]
-    for hand in (controller.lower_cards, controller.upper_cards, controller.centre_cards, dealing_hand, moving_hand, holder_hand):
-        draw_hand(hand, controller.screen)
+def draw_loading(screen: pygame.Surface, layout: Layout) -> None:
+    text = render_text("Loading...", layout.font_size(40), BLACK)
+    screen.blit(text, text.get_rect(center=(layout.width/2, layout.height/2)))
+    pygame.display.flip()
 
 
-def draw_buttons(controller: Controller) -> None:
-    for button in controller.buttons:
-        button.draw(controller.screen)
+def get_background(layout: Layout) -> pygame.Surface:
+    background = pygame.Surface(layout.size()).convert()
+    background.fill(GREEN)
+    pygame.draw.line(background, BLACK, (0, layout.centre_lower_bound), (layout.width, layout.centre_lower_bound))
+    pygame.draw.line(background, BLACK, (0, layout.centre_upper_bound), (layout.width, layout.centre_upper_bound))
+    return background
 
 
-def draw_controller(controller: Controller) -> None:
-    controller.screen.fill(GREEN)
-    draw_hands(controller)
-    if len(controller.deck_values) != 0:
-        draw_hand([controller.deck_card], controller.screen)
-    if len(controller.buttons) != 0:
-        draw_buttons(controller)
-    if len(controller.upper_won_cards) != 0:
-        draw_hand([controller.upper_won_card], controller.screen)
-    if len(controller.lower_won_cards) != 0:
-        draw_hand([controller.lower_won_card], controller.screen)
-    pygame.draw.line(controller.screen, BLACK, (0, CENTRE_LOWER_BOUND), (WIDTH, CENTRE_LOWER_BOUND))
-    pygame.draw.line(controller.screen, BLACK, (0, CENTRE_UPPER_BOUND), (WIDTH, CENTRE_UPPER_BOUND))
-    pygame.display.flip()
+def sprites(controller: Controller, cards: CardSet) -> List[Card]:
+    return [controller.cards[index] for index in indices(cards)]
 
 
-def deal_cards(controller: Controller, centre_deal: bool = False) -> Controller:
-    initial_lower = controller.lower_cards
-    initial_upper = controller.upper_cards
-    if controller.dealables:
-        if controller.pointer != DEAL_INTERVAL:
-            card, placement, incrementx, incrementy = controller.dealables[0]
-            card.set_position(card.initial_x+incrementx, card.initial_y+incrementy)
-            controller.pointer = controller.pointer + 1
-        else:
-            card, placement, _, _ = controller.dealables[0]
-            if placement == "lower":
-                controller.lower_cards = controller.lower_cards + [card]
-            elif placement == "upper":
-                controller.upper_cards = controller.upper_cards + [card]
-            else:
-                controller.centre_cards = controller.centre_cards + [card]
-                controller = rearrange_centre_cards(controller)
-            controller.dealables = list()
-            controller.pointer = 0
+def visible_sprites(controller: Controller) -> List[Tuple[pygame.sprite.DirtySprite, int]]:
+    visible = list()
+    if len(controller.state.deck) != 0:
+        visible.append((controller.deck_card, PILE_LAYER))
+    if controller.upper_won_cards:
+        visible.append((controller.upper_won_card, PILE_LAYER))
+    if controller.lower_won_cards:
+        visible.append((controller.lower_won_card, PILE_LAYER))
+    for cards in (controller.lower_cards, controller.upper_cards, controller.centre_cards):
+        for card in sprites(controller, cards):
+            visible.append((card, DRAGGING_LAYER if card.dragging else HAND_LAYER))
+    visible.extend((card, MOVING_LAYER) for card in sprites(controller, controller.holder))
+    visible.extend((card, MOVING_LAYER) for card in controller.tweener.sprites())
+    visible.extend((button, BUTTON_LAYER) for button in controller.buttons)
+    if controller.profiler.show_overlay:
+        visible.append((controller.profiler.overlay, OVERLAY_LAYER))
+
+    # After a resize cards get their textures at the new size as they are next shown.
+    size = controller.layout.card_size()
+    for sprite, _ in visible:
+        if isinstance(sprite, Card) and sprite.size != size:
+            sprite.set_size(size)
+    return visible
+
 
+def draw_controller(controller: Controller) -> None:
+    rects = controller.renderer.draw(visible_sprites(controller), present=False)
+    controller.profiler.mark("draw")
+    if rects:
+        pygame.display.update(rects)
+    controller.profiler.mark("present")
+
+
+def land_card(controller: Controller, card: Card, placement: str) -> Controller:
+    if placement == "lower":
+        controller.lower_cards |= bit(card.index())
+    elif placement == "upper":
+        controller.upper_cards |= bit(card.index())
+    elif placement == "centre":
+        controller.centre_cards |= bit(card.index())
+        controller = rearrange_centre_cards(controller)
+    elif placement == "upper_won":
+        controller.upper_won_cards |= bit(card.index())
     else:
-        if centre_deal:
-            suit, value = controller.deck_values.pop()
-            card = Card(suit, value, (DECK_x, DECK_y))
-            endy = CENTRE_HAND_HEIGHT
-            endx = WIDTH/2
-            incrementx = (endx - card.initial_x) / DEAL_INTERVAL
-            incrementy = (endy - card.initial_y) / DEAL_INTERVAL
-            controller.dealables = controller.dealables + [(card, "centre", incrementx, incrementy)]
+        controller.lower_won_cards |= bit(card.index())
+    return controller
+
+
+def deal_cards(controller: Controller, deals: List[Tuple[int, str]]) -> Controller:
+    layout = controller.layout
+    placed = {"lower": count(controller.lower_cards), "upper": count(controller.upper_cards)}
+    for i, (index, placement) in enumerate(deals):
+        card = controller.cards.get(index)
+        if card is None:
+            value, suit = card_tuple(index)
+            card = Card(suit, value, (layout.deck_x, layout.deck_y), layout.card_size())
+            controller.cards[index] = card
+        else:
+            card.reset((layout.deck_x, layout.deck_y), layout.card_size())
+        if placement == "lower":
+            endy = layout.lower_hand_height
+            endx = layout.placements[placed["lower"]]
+            placed["lower"] = placed["lower"] + 1
+        elif placement == "upper":
+            card.flip()
+            endy = layout.upper_hand_height
+            endx = layout.placements[placed["upper"]]
+            placed["upper"] = placed["upper"] + 1
         else:
-            if len(initial_lower) <= len(initial_upper):
-                suit, value = controller.deck_values.pop()
-                card = Card(suit, value, (DECK_x, DECK_y))
-                endy = LOWER_HAND_HEIGHT
-                endx = PLACEMENT_DICT[len(initial_lower)]
-                incrementx = (endx - card.initial_x) / DEAL_INTERVAL
-                incrementy = (endy - card.initial_y) / DEAL_INTERVAL
-                controller.dealables = controller.dealables + [(card, "lower", incrementx, incrementy)]
-            else:
-                suit, value = controller.deck_values.pop()
-                card = Card(suit, value, (DECK_x, DECK_y))
-                card.flip()
-                endy = UPPER_HAND_HEIGHT
-                endx = PLACEMENT_DICT[len(initial_upper)]
-                incrementx = (endx - card.initial_x) / DEAL_INTERVAL
-                incrementy = (endy - card.initial_y) / DEAL_INTERVAL
-                controller.dealables = controller.dealables + [(card, "upper", incrementx, incrementy)]
+            endy = layout.centre_hand_height
+            endx = layout.width/2
+        controller.tweener.add(
+            card, (endx, endy), DEAL_TIME, delay=i * DEAL_STAGGER,
+            on_finish=lambda card=card, placement=placement: land_card(controller, card, placement),
+        )
     return controller
 
 
 def rearrange_buttons(controller: Controller) -> Controller:
-    increment = BUTTON_HEIGHT * 1.1
+    layout = controller.layout
+    increment = layout.button_height * 1.1
     pixels_needed = len(controller.buttons) * increment
-    bottom_margin = HEIGHT/2 - pixels_needed/2
+    bottom_margin = layout.height/2 - pixels_needed/2
 
     for i, button in enumerate(controller.buttons):
-        button.set_position(WIDTH/2, i * increment + bottom_margin)
+        button.set_position(layout.width/2, i * increment + bottom_margin)
     return controller
 
 
 def rearrange_centre_cards(controller: Controller) -> Controller:
-    increment = CARD_WIDTH*1.5
-    pixels_needed = len(controller.centre_cards)*increment
+    layout = controller.layout
+    increment = layout.card_width*1.5
+    pixels_needed = count(controller.centre_cards)*increment
 
-    left_margin = 7*WIDTH/12 - pixels_needed/2
+    left_margin = 7*layout.width/12 - pixels_needed/2
 
-    for i, card in enumerate(controller.centre_cards):
-        card.set_position(i*increment+left_margin, CENTRE_HAND_HEIGHT)
+    for i, card in enumerate(sprites(controller, controller.centre_cards)):
+        card.set_position(i*increment+left_margin, layout.centre_hand_height)
     return controller
 
 
-def move_cards(controller: Controller, cards: List[Card], centre: bool = False, place: str = "") -> Controller:
-    if controller.moveables:
-        if controller.pointer != MOVE_INTERVAL:
-            for moveable in controller.moveables:
-                card, placement, incrementx, incrementy = moveable
-                card.set_position(card.initial_x+incrementx, card.initial_y+incrementy)
-            controller.pointer = controller.pointer + 1
-        else:
-            for moveable in controller.moveables:
-                card, placement, _, _ = moveable
-                if placement == "centre":
-                    controller.centre_cards = controller.centre_cards + [card]
-                    controller.centre_updated = True
-                elif placement == "upper_won":
-                    controller.upper_won_cards = controller.upper_won_cards + [card]
-                    controller.player_last_won = False
-                else:
-                    controller.lower_won_cards = controller.lower_won_cards + [card]
-                    controller.player_last_won = True
-            controller.moveables = list()
-            controller.pointer = 0
-            if not controller.centre_updated:
-                controller.player_1_turn = not controller.player_1_turn
-            return rearrange_centre_cards(controller)
-    elif controller.player_1_turn or place == "lower":
-        endy = LOWER_WON_HEIGHT
-        endx = WON_WIDTH
-        for card in cards:
-            if card in controller.holder:
-                controller.holder.remove(card)
-            incrementx = (endx - card.initial_x) / MOVE_INTERVAL
-            incrementy = (endy - card.initial_y) / MOVE_INTERVAL
-            controller.moveables = controller.moveables + [(card, "lower_won", incrementx, incrementy)]
-    elif centre:
-        endy = CENTRE_HAND_HEIGHT
-        endx = WIDTH / 2
-        for card in cards:
-            if card in controller.holder:
-                controller.holder.remove(card)
-            incrementx = (endx - card.initial_x) / MOVE_INTERVAL
-            incrementy = (endy - card.initial_y) / MOVE_INTERVAL
-            controller.moveables = controller.moveables + [(card, "centre", incrementx, incrementy)]
+def move_cards(controller: Controller, cards: List[Card], placement: str) -> Controller:
+    layout = controller.layout
+    if placement == "centre":
+        endy = layout.centre_hand_height
+        endx = layout.width / 2
+    elif placement == "upper_won":
+        endy = layout.upper_won_height
+        endx = layout.won_width
     else:
-        endy = UPPER_WON_HEIGHT
-        endx = WON_WIDTH
-        for card in cards:
-            if card in controller.holder:
-                controller.holder.remove(card)
-            incrementx = (endx - card.initial_x) / MOVE_INTERVAL
-            incrementy = (endy - card.initial_y) / MOVE_INTERVAL
-            controller.moveables = controller.moveables + [(card, "upper_won", incrementx, incrementy)]
-    return controller
+        endy = layout.lower_won_height
+        endx = layout.won_width
+    for card in cards:
+        held = ~bit(card.index())
+        controller.holder &= held
+        controller.centre_cards &= held
+        controller.lower_cards &= held
+        controller.upper_cards &= held
+        controller.tweener.add(
+            card, (endx, endy), MOVE_TIME,
+            on_finish=lambda card=card: land_card(controller, card, placement),
+        )
+    return rearrange_centre_cards(controller)
+
 
+def resize(controller: Controller, size: Tuple[int, int]) -> Controller:
+    # Everything keeps its place relative to the window, cards in flight carry on to the same relative spot.
+    old = controller.layout
+    layout = Layout(*size)
+    if layout.size() == old.size():
+        controller.renderer.repaint = True
+        return controller
+    controller.layout = layout
+    controller.screen = pygame.display.get_surface()
+    scale_x = layout.width / old.width
+    scale_y = layout.height / old.height
+
+    for tween in controller.tweener.tweens:
+        tween.start = (tween.start[0] * scale_x, tween.start[1] * scale_y)
+        tween.end = (tween.end[0] * scale_x, tween.end[1] * scale_y)
+    for card in controller.cards.values():
+        if card.dragging:
+            card.dragging = False
+            card.set_position(card.initial_x, card.initial_y)
+        card.set_position(card.rect.centerx * scale_x, card.rect.centery * scale_y)
+    for card in sprites(controller, controller.lower_cards):
+        card.set_position(card.rect.centerx, layout.lower_hand_height)
+    for card in sprites(controller, controller.upper_cards):
+        card.set_position(card.rect.centerx, layout.upper_hand_height)
+    controller.deck_card.set_position(layout.deck_x, layout.deck_y)
+    controller.upper_won_card.set_position(layout.won_width, layout.upper_won_height)
+    controller.lower_won_card.set_position(layout.won_width, layout.lower_won_height)
+    controller.buttons = [
+        OptionButton(0, 0, button.initial_card, button.option, layout, button.scopa) for button in controller.buttons
+    ]
+
+    # Textures for the new size load in the background, the old size is dropped once no card uses it.
+    preload_textures(START_DECK_VALUES, layout.card_size(), background=True)
+    drop_textures(layout.card_size())
+    controller.renderer.resize(controller.screen, get_background(layout))
+    controller = rearrange_buttons(controller)
+    return rearrange_centre_cards(controller)
 
-def valid_options(options: List[List[Card]]):
-    if options:
-        if any(len(option) == 1 for option in options):
-            return [option for option in options if len(option) == 1]
-    return options
 
+def window_event(controller: Controller, event: pygame.event.Event) -> bool:
+    # Events handled the same whatever the game is doing, True if it was one of them.
+    if controller.profiler.handle_event(event):
+        return True
+    if event.type == pygame.VIDEOEXPOSE:
+        controller.renderer.repaint = True
+        return True
+    if event.type == pygame.VIDEORESIZE:
+        # Only the last size matters when dragging the window edge sends a burst of these.
+        controller.resize_to = event.size
+        return True
+    return False
+
+
+def animate_event(controller: Controller) -> Controller:
+    kind, card_indices, placement = controller.events[0]
+    if kind == "deal":
+        # All the deals in a row are animated together.
+        deals = list()
+        while controller.events and controller.events[0][0] == "deal":
+            _, (index,), placement = controller.events.pop(0)
+            deals.append((index, placement))
+        return deal_cards(controller, deals)
+    controller.events.pop(0)
+    cards = [controller.cards[index] for index in card_indices]
+    if kind == "play":
+        card, = cards
+        if controller.holder & bit(card.index()):
+            # Dropped onto the centre by the player, no need to animate it.
+            controller.holder &= ~bit(card.index())
+            controller.centre_cards |= bit(card.index())
+            return rearrange_centre_cards(controller)
+        if not card.showing:
+            card.flip()
+    return move_cards(controller, cards, placement)
 
-def calculate_options(card: Card, centre_cards: List[Card]):
-    def summation(centre: List[Card], total: int):
-        def func(cards: List[Card], total_num: int, partial=list(), partial_sum=0):
-            if partial_sum == total_num:
-                yield partial
-            if partial_sum >= total_num:
-                return
-            for i, card in enumerate(cards):
-                remaining = cards[i + 1:]
-                yield from func(remaining, total_num, partial + [card], partial_sum + card.value)
-        return func(centre, total)
 
-    return valid_options(list(summation(centre_cards, card.value)))
+def play_card(controller: Controller, card: int, option: CardSet) -> Controller:
+    events = step(controller.state, (card, option))
+    controller.events = controller.events + events
+    controller.worker.observe(events)
+    controller.record.add((card, option))
+    return controller
+
+
+def save_record(controller: Controller) -> None:
+    if controller.record_path is None or not controller.record.actions:
+        return
+    controller.record.finish(controller.state)
+    write_record(controller.record_path, controller.record)
 
 
 def turn_logic(card: Card, controller: Controller,) -> Controller:
 
-    if controller.player_1_turn:
-        controller.lower_cards.remove(card)
-        controller.holder = controller.holder + [card]
-        win_options = calculate_options(card, controller.centre_cards)
+    if controller.state.player_1_turn:
+        controller.lower_cards &= ~bit(card.index())
+        controller.holder |= bit(card.index())
+        win_options = [option for _, option in legal_moves(controller.state, card.index()) if option]
         if win_options:
 
             controller.buttons = controller.buttons + [
-                OptionButton(x=WIDTH, y=HEIGHT/2, initial_card=card, option=option, scopa=(len(option) == len(controller.centre_cards)))
+                OptionButton(x=controller.layout.width, y=controller.layout.height/2, initial_card=card, option=option,
+                             layout=controller.layout, scopa=(option == controller.state.centre_cards))
                 for option in win_options
             ]
             controller = rearrange_buttons(controller)
             controller.wait_for_button = True
         else:
-            controller.centre_cards = controller.centre_cards + [card]
+            controller = play_card(controller, card.index(), EMPTY)
 
     return rearrange_centre_cards(controller)
 
@@ -470,15 +560,10 @@ def event_loop(event, hand: List[Card], controller: Controller):
         for card in hand:
             if event.button == 1:
                 x, y = event.pos
-                if CENTRE_UPPER_BOUND <= y + card.offset_y <= CENTRE_LOWER_BOUND and card.dragging:
+                if controller.layout.centre_upper_bound <= y + card.offset_y <= controller.layout.centre_lower_bound and card.dragging:
                     card.set_position(x + card.offset_x, y + card.offset_y)
                     card.dragging = False
-                    controller = turn_logic(card, controller,)
-                    if controller.wait_for_button:
-                        return controller
-                    if not controller.moveables:
-                        controller.player_1_turn = not controller.player_1_turn
-                    return rearrange_centre_cards(controller)
+                    return turn_logic(card, controller,)
                 elif card.dragging:
                     card.set_position(card.initial_x, card.initial_y)
                     card.dragging = False
@@ -492,369 +577,237 @@ def event_loop(event, hand: List[Card], controller: Controller):
     return controller
 
 
-def combine_priorities(*ints) -> int:
-    return sum(ints)
-
-
-def option_weight(card: Card, option: List[Card], controller: Controller, combiner: Callable = combine_priorities):
-
-    won_cards = controller.upper_won_cards
-    lost_cards = controller.lower_won_cards
-    winnable_cards = option + [card]
-
-    won_tuples = [card.tuple() for card in won_cards]
-    lost_tuples = [card.tuple() for card in lost_cards]
-    winnable_tuples = [card.tuple() for card in winnable_cards]
+def computer_event_loop(controller: Controller) -> Controller:
+    result = controller.worker.result()
+    if result is None:
+        if not controller.worker.pending:
+            controller.worker.request(controller.state, controller.think_time)
+        # Still thinking, keep drawing.
+        return controller
+    chosen_card, chosen_option = result
+    if chosen_card is None:
+        print(f"ENCOUNTERED BUG in game {controller.seed}")
+        return rearrange_centre_cards(controller)
+    return play_card(controller, chosen_card, chosen_option)
 
-    won_golds = len([card for card in won_cards if card.suit == "Coins"])
-    lost_golds = len([card for card in lost_cards if card.suit == "Coins"])
-    winnable_golds = [card for card in winnable_cards if card.suit == "Coins"]
 
-    won_napola_cards = len([card for card in NAPOLA_CARDS if card in won_tuples])
-    lost_napola_cards = len([card for card in NAPOLA_CARDS if card in lost_tuples])
-    winnable_napola_cards = len([card for card in NAPOLA_CARDS if card in winnable_tuples])
+def is_animating(controller: Controller) -> bool:
+    return bool(controller.tweener.busy() or controller.events or not controller.state.player_1_turn)
 
-    won_sevens = len([card for card in won_cards if card.value == 7])
-    lost_sevens = len([card for card in lost_cards if card.value == 7])
-    winnable_sevens = len([card for card in winnable_cards if card.value == 7])
 
-    napola_priority = 0
-    seven_priority = 0
-    gold_seven_priority = 0
-    golds_priority = 0
-    cards_priority = len(winnable_cards)
-    scopa_priority = 10 if len(controller.centre_cards) == len(winnable_cards) else 0
-
-    # TODO: Rewrite napola choosing
-    if winnable_napola_cards:
-        if lost_napola_cards == 3:
-            # Lost napola point, Just stop them getting more golds
-            if winnable_golds:
-                napola_priority = min(winnable_golds, key=lambda c: c.value)
-        else:
-            if winnable_napola_cards >= 1:
-                if lost_napola_cards >= 1:
-                    # Stop other player getting napola
-                    napola_priority = (lost_napola_cards + winnable_napola_cards)*2
-                else:
-                    # Can take it easy
-                    napola_priority = winnable_napola_cards
-            if won_napola_cards >= 1:
-                # More incentive to get the napola cards
-                napola_priority = napola_priority * (won_napola_cards + 1)
-            if won_napola_cards == 3:
-                if winnable_golds:
-                    # Grab as many cards as we can get
-                    napola_priority = napola_priority * 3
-
-    if (7, "Coins") in winnable_tuples:
-        gold_seven_priority = 10
-
-    if winnable_sevens:
-        if lost_sevens > 2:
-            # Lost the seven point
-            pass
-        elif lost_sevens == 2:
-            # Stop them getting more sevens
-            seven_priority = winnable_sevens * 2
-        else:
-            # Lost sevens is either 0 or 1 so still have a chance
-            if won_sevens >= 2:
-                # Already won the point, no need to prioritze
-                seven_priority = winnable_sevens
-            else:
-                # Won sevens is 0 or 1 so can still win
-                seven_priority = winnable_sevens * 3
-
-    if winnable_golds:
-        if lost_golds > 5:
-            # Lost point
-            pass
-        elif lost_golds == 5:
-                # Stop them getting more golds
-                golds_priority = len(winnable_golds) * 2
-        else:
-            # Lost golds is less than 5 so can still win point
-            if won_golds >= 5:
-                # Already won, no need to prioritize
-                golds_priority = len(winnable_golds)
-            else:
-                # Won golds is 4 or below so can still win
-                golds_priority = len(winnable_golds) * 3
-
-    return combiner(napola_priority, seven_priority, gold_seven_priority, golds_priority, cards_priority, scopa_priority)
-
-
-def decide_option(controller: Controller) -> Tuple[Card, List[Card]]:
-    hand = controller.upper_cards
-    options_dict = {card: calculate_options(card, controller.centre_cards) for card in hand}
-    options_weight_dict = {
-        card: {
-            option_weight(card, option, controller): option
-            for option in options_dict[card]
-        }
-        for card in options_dict
-    }
-    tupled = [(card, weight, option) for card in options_weight_dict for weight, option in options_weight_dict[card].items()]
-    if not tupled:
-        if not hand:
-            return None, None
-        return hand[0], None
-    card, _, option = max(tupled, key=lambda x: x[1])
-    return card, option
-
-
-def computer_event_loop(controller: Controller) -> Controller:
-    if not controller.centre_updated:
-        chosen_card, chosen_option = decide_option(controller)
-        if chosen_card is None:
-            print("ENCOUNTERED BUG")
-            return rearrange_centre_cards(controller)
-        if chosen_option is not None:
-            if len(chosen_option) == len(controller.centre_cards):
-                controller.upper_points = controller.upper_points + 1
-        if not controller.chosen_card:
-            controller.chosen_card = chosen_card
-            controller.chosen_option = chosen_option
-            controller.upper_cards.remove(chosen_card)
-            chosen_card.flip()
-            controller.holder = controller.holder + [chosen_card]
-            return move_cards(controller, [chosen_card], True)
-    else:
-        controller.centre_updated = False
-        chosen_option = controller.chosen_option
-        if not chosen_option:
-            controller.chosen_card = None
-            controller.chosen_option = None
-            controller.player_1_turn = True
-            return rearrange_centre_cards(controller)
-        for card_centre in chosen_option:
-            controller.centre_cards.remove(card_centre)
-        controller.centre_cards.remove(controller.chosen_card)
-        controller = move_cards(controller, chosen_option + [controller.chosen_card])
-        controller.chosen_card = None
-        controller.chosen_option = None
-
-    return rearrange_centre_cards(controller)
+def wait_for_events() -> List[pygame.event.Event]:
+    # Sleeps until there is input, nothing on screen changes before then.
+    event = pygame.event.wait(IDLE_TIMEOUT)
+    if event.type == pygame.NOEVENT:
+        return list()
+    return [event] + pygame.event.get()
 
 
 def game_logic(controller: Controller) -> Controller:
     # Only run the logic if not quitted and the game is explicitly running
+    profiler = controller.profiler
     while not controller.quit and controller.game_running:
-        if controller.empty and (len(controller.lower_cards) == 0 and len(controller.upper_cards) == 0):
-            if controller.moveables:
-                controller = move_cards(controller, list())
-            elif (controller.centre_cards or not controller.holder) and not controller.wait_for_button:
-                place = "lower" if controller.player_last_won else ""
-                held = controller.centre_cards.copy()
-                controller.holder = controller.holder + held
-                controller.centre_cards = list()
-                controller = move_cards(controller, held, False, place)
-            # elif controller.chosen_option is not None:
-            #     controller = computer_event_loop(controller)
-            else:
-                controller.game_running = False
+        profiler.begin()
+        if controller.tweener.busy():
+            controller.tweener.update()
+            profiler.mark("logic")
+        elif controller.events:
+            controller = animate_event(controller)
+            profiler.mark("logic")
+        elif controller.state.game_over:
+            controller.game_running = False
+        elif not controller.state.player_1_turn:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    controller.quit = True
+                    controller.game_running = False
+                else:
+                    window_event(controller, event)
+            profiler.mark("events")
+            controller = computer_event_loop(controller)
+            profiler.mark("ai")
         else:
-            if controller.moveables:
-                controller = move_cards(controller, list())
-            elif controller.chosen_card and controller.chosen_option:
-                controller = computer_event_loop(controller)
-            elif controller.dealing or (len(controller.lower_cards) == 0 and len(controller.upper_cards) == 0 and not controller.wait_for_button):
-                controller.dealing = True
-                controller = deal_cards(controller)
-                if len(controller.lower_cards) == 3 and len(controller.upper_cards) == 3:
-                    if controller.first_deal:
-                        if len(controller.centre_cards) < 4:
-                            controller = deal_cards(controller, True)
-                        else:
-                            controller.first_deal = False
-                            controller.dealing = False
-                    else:
-                        controller.dealing = False
-                        if not controller.deck_values:
-                            controller.empty = True
-            elif not controller.player_1_turn and controller.upper_cards:
-                controller = computer_event_loop(controller) # Delete if not working
-            else:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        controller.quit = True
-                        controller.game_running = False
-                    elif controller.wait_for_button:
-                        if event.type == pygame.MOUSEBUTTONDOWN:
-                            if event.button == 1:
-                                for button in controller.buttons:
-                                    if button.rect.collidepoint(event.pos):
-                                        for card in button.option:
-                                            controller.centre_cards.remove(card)
-                                        if button.scopa:
-                                            controller.lower_points = controller.lower_points + 1
-                                        cards = button.option + [button.initial_card]
-                                        controller = move_cards(controller, cards)
-                                        controller.buttons = list()
-                                        controller.wait_for_button = False
-                    else:
-                        if controller.player_1_turn:
-                            controller = event_loop(event, controller.lower_cards, controller)
-                        # else:
-                        #     controller = computer_event_loop(controller)
+            events = wait_for_events()
+            profiler.mark("wait")
+            for event in events:
+                if window_event(controller, event):
+                    continue
+                if event.type == pygame.QUIT:
+                    controller.quit = True
+                    controller.game_running = False
+                elif controller.wait_for_button:
+                    if event.type == pygame.MOUSEBUTTONDOWN:
+                        if event.button == 1:
+                            for button in controller.buttons:
+                                if button.rect.collidepoint(event.pos):
+                                    controller = play_card(controller, button.initial_card.index(), button.option)
+                                    controller.buttons = list()
+                                    controller.wait_for_button = False
+                                    break
+                else:
+                    controller = event_loop(event, sprites(controller, controller.lower_cards), controller)
+            profiler.mark("events")
+
+        if controller.resize_to is not None:
+            controller = resize(controller, controller.resize_to)
+            controller.resize_to = None
+            profiler.mark("logic")
 
         draw_controller(controller)
-        pygame.display.update()
 
-        controller.clock.tick(FPS)
+        # Waiting on input already blocked, only hold the frame rate while something is moving.
+        if is_animating(controller):
+            controller.clock.tick(FPS)
+        profiler.mark("wait")
+        profiler.end()
     return controller
 
 
-def score(controller: Controller) -> Tuple[Dict[str, int], Dict[str, int]]:
-    def gold_tuples(hand: List[Card]) -> List[Tuple[int, str]]:
-        return [c.tuple() for c in hand if c.suit == "Coins"]
-
-    def cards(hand: List[Card]) -> str:
-        length = len(hand)
-        if length > 20:
-            return "Win"
-        elif length == 20:
-            return "Draw"
-        else:
-            return "Lose"
-
-    def coins(gold_tups: List[Tuple[int, str]]) -> str:
-        length = len(gold_tups)
-        if length > 5:
-            return "Win"
-        elif length == 5:
-            return "Draw"
-        else:
-            return "Lose"
-
-    def settebello(hand: List[Card]) -> str:
-        return "Win" if (7, "Coins") in (card.tuple() for card in hand) else "Lose"
-
-    def sevens(hand: List[Card]) -> str:
-        seven = [card for card in hand if card.value == 7]
-        if len(seven) > 2:
-            return "Win"
-        elif len(seven) == 2:
-            sixes = [card for card in hand if card.value == 6]
-            if len(sixes) > 2:
-                return "Win"
-            if len(sixes) == 2:
-                return "Draw"
-        else:
-            return "Lose"
-
-    def napola(gold_tups: List[Tuple[int, str]]) -> int:
-        if all(card in gold_tups for card in NAPOLA_CARDS):
-            for i in range(4, 11):
-                if (i, "Coins") in gold_tups:
-                    pass
-                else:
-                    return i-1
-        return 0
-
-    lower_scopa = controller.lower_points
-    upper_scopa = controller.upper_points
-
-    lower_hand = controller.lower_won_cards
-    gold_tups = gold_tuples(lower_hand)
+def draw_results(controller: Controller, surfaces: List[Tuple[pygame.Surface, Tuple[float, float]]], restart_button: Button) -> None:
+    controller.screen.fill(GREEN)
+    for surface, position in surfaces:
+        controller.screen.blit(surface, position)
+    restart_button.draw(controller.screen)
+    pygame.display.flip()
 
-    lower_points = {"scopa": lower_scopa, "napola": napola(gold_tups)}
-    upper_points = {"scopa": upper_scopa, "napola": napola(gold_tuples(controller.upper_won_cards))}
 
-    for func in (cards, coins, sevens, settebello):
-        if func == coins:
-            result = func(gold_tups)
-        else:
-            result = func(lower_hand)
-        if result == "Win":
-            lower_points[func.__name__] = 1
-            upper_points[func.__name__] = 0
-        elif result == "Draw":
-            lower_points[func.__name__] = 0
-            upper_points[func.__name__] = 0
-        else:
-            lower_points[func.__name__] = 0
-            upper_points[func.__name__] = 1
-    return lower_points, upper_points
-
-
-def find_winner(controller: Controller) -> Tuple[str, Dict[str, int], Dict[str, int]]:
-    lower_scores, upper_scores = score(controller)
-    lower_points = sum(lower_scores.values())
-    upper_points = sum(upper_scores.values())
-    if lower_points > upper_points:
-        return "You", lower_scores, upper_scores
-    elif lower_points < upper_points:
-        return "Computer", lower_scores, upper_scores
+def results(controller: Controller) -> Tuple[List[Tuple[pygame.Surface, Tuple[float, float]]], Button]:
+    layout = controller.layout
+    win_size = layout.font_size(80)
+    point_size = layout.font_size(40)
+    winner, lower, upper = find_winner(controller.state)
+    if winner == "You":
+        text = "You win!"
+    elif winner == "Computer":
+        text = "You Lose :("
     else:
-        return "Draw", lower_scores, upper_scores
+        text = "Draw!"
+    lower_points = sum(lower.values())
+    upper_points = sum(upper.values())
+    point_text = f"Your points: {lower_points}, computer points: {upper_points}."
+
+    left_surfaces = [render_text("Your points:", point_size, BLACK, False)]
+    right_surfaces = [render_text("Computer points:", point_size, BLACK, False)]
+    for name, point in lower.items():
+        left_surfaces.append(render_text(f"{name}: {point}", point_size, BLACK, False))
+    for name, point in upper.items():
+        right_surfaces.append(render_text(f"{name}: {point}", point_size, BLACK, False))
+
+    scaled = layout.scaled
+    surfaces = [
+        (render_text(text, win_size, BLACK, False), (layout.width/2 - scaled(160), layout.height/2 - scaled(160))),
+        (render_text(point_text, point_size, BLACK, False), (layout.width / 2 - scaled(240), 2*layout.height/3 - scaled(80))),
+    ]
+    for i in range(len(left_surfaces)):
+        surfaces.append((left_surfaces[i], (layout.width / 6 - scaled(80), layout.height/6 + i * scaled(80))))
+        surfaces.append((right_surfaces[i], (5*layout.width / 6 - scaled(80), layout.height / 6 + i * scaled(80))))
+    restart_button = Button(layout.width/2 - layout.button_width/2, 2*layout.height/3, "Restart?", layout)
+    return surfaces, restart_button
 
 
 def win_logic(controller) -> Controller:
-    winfont = pygame.font.SysFont(None, 80)
-    pointfont = pygame.font.SysFont(None, 40)
-    winner = ''
-    text = ''
-    left_surfaces = []
-    right_surfaces = []
+    # The results don't change, so everything is rendered once up front, and again if the window changes size.
+    surfaces, restart_button = results(controller)
+    draw_results(controller, surfaces, restart_button)
     while not controller.quit and not controller.restart:
-        if not winner:
-            winner, lower, upper = find_winner(controller)
-            if winner == "You":
-                text = "You win!"
-            elif winner == "Computer":
-                text = "You Lose :("
-            else:
-                text = "Draw!"
-            lower_points = sum(lower.values())
-            upper_points = sum(upper.values())
-            point_text = f"Your points: {lower_points}, computer points: {upper_points}."
-        restart_button = Button(WIDTH/2 - BUTTON_WIDTH/2, 2*HEIGHT/3, "Restart?")
-        for event in pygame.event.get():
+        for event in wait_for_events():
             if event.type == pygame.QUIT:
                 controller.quit = True
+            elif event.type == pygame.VIDEORESIZE:
+                controller.resize_to = event.size
+            elif event.type == pygame.VIDEOEXPOSE:
+                draw_results(controller, surfaces, restart_button)
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:
                     if restart_button.rect.collidepoint(event.pos):
                         controller.restart = True
+        if controller.resize_to is not None:
+            controller = resize(controller, controller.resize_to)
+            controller.resize_to = None
+            surfaces, restart_button = results(controller)
+            draw_results(controller, surfaces, restart_button)
+    return controller
+
 
-        controller.screen.fill(GREEN)
-        if not left_surfaces:
-            for name, point in lower.items():
-                left_surfaces.append(pointfont.render(f"{name}: {point}", False, (0, 0, 0)))
-            for name, point in upper.items():
-                right_surfaces.append(pointfont.render(f"{name}: {point}", False, (0, 0, 0)))
-            left_surfaces = [pointfont.render("Your points:", False, (0, 0, 0))] + left_surfaces
-            right_surfaces = [pointfont.render("Computer points:", False, (0, 0, 0))] + right_surfaces
-
-        textsurface = winfont.render(text, False, (0, 0, 0))
-        pointsurf = pointfont.render(point_text, False, (0, 0, 0))
-
-        controller.screen.blit(textsurface, (WIDTH/2 - 160, HEIGHT/2 - 160))
-        controller.screen.blit(pointsurf, (WIDTH / 2 - 240, 2*HEIGHT/3 - 80))
-        for i in range(len(left_surfaces)):
-            controller.screen.blit(left_surfaces[i], (WIDTH / 6 - 80, HEIGHT/6 + i * 80))
-            controller.screen.blit(right_surfaces[i], (5*WIDTH / 6 - 80, HEIGHT / 6 + i * 80))
-        restart_button.draw(controller.screen)
-        pygame.display.update()
-        pygame.display.flip()
-        controller.clock.tick(60)
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="scopa", description="The classic Italian Card Game.")
+    parser.add_argument("--speed", type=float, default=1.0, help="Animation speed, 2 is twice as fast and 0 skips animations.")
+    parser.add_argument("--ai", choices=("greedy", "wary", "ismcts", "engine"), default="greedy", help="How the computer picks its moves.")
+    parser.add_argument("--engine", metavar="COMMAND", help="External engine to play against with --ai engine, see scopa.protocol.")
+    parser.add_argument("--ai-ms", type=float, default=200, help="Thinking time per computer move, in ms.")
+    parser.add_argument("--profile-out", metavar="PATH", help="Write each frame's phase timings to a CSV file.")
+    parser.add_argument("--size", type=parse_size, metavar="WIDTHxHEIGHT",
+                        help="Window size, the window can also be resized while playing. Fits the screen by default.")
+    parser.add_argument("--seed", type=parse_seed, help="Seed for the first game's shuffle, random by default.")
+    parser.add_argument("--record", metavar="PATH", help="Append every game to a record file, see python -m scopa.replay.")
+    args = parser.parse_args(argv)
+    if args.ai == "engine" and not args.engine:
+        parser.error("--ai engine needs --engine COMMAND")
+    return args
+
+
+def get_strategy(args: argparse.Namespace) -> Callable:
+    if args.ai == "ismcts":
+        # Searches until the worker's deadline, see Controller.think_time.
+        return ISMCTS(milliseconds=None)
+    if args.ai == "engine":
+        # Searches until the worker's deadline too, with go infinite.
+        return EngineStrategy(shlex.split(args.engine), milliseconds=None)
+    if args.ai == "wary":
+        return Wary()
+    return decide_option
+
+
+def restart(controller: Controller, seed: int = None, deck_values: List[Tuple[str, int]] = None) -> Controller:
+    # A new game in the same window. The card sprites, worker thread, renderer and every cache carry over.
+    # The deck is shuffled from seed, or is deck_values if given.
+    save_record(controller)
+    controller.worker.cancel()
+    # An external engine is told about the new game when it's next asked for a move, see EnginePool.acquire.
+    controller.worker.end_game()
+    controller.tweener.tweens = list()
+    # Centres rarely come up again in another game, a session running for days shouldn't keep them all.
+    clear_index()
+    controller.seed = seed if seed is not None else new_seed()
+    controller.state = GameState(deck_values if deck_values is not None else seeded_deck(controller.seed))
+    controller.record = GameRecord(controller.seed, controller.state.deck, controller.players)
+    controller.lower_cards = EMPTY
+    controller.upper_cards = EMPTY
+    controller.centre_cards = EMPTY
+    controller.lower_won_cards = EMPTY
+    controller.upper_won_cards = EMPTY
+    controller.holder = EMPTY
+    controller.events = deal(controller.state)
+    controller.worker.observe(controller.events)
+    controller.buttons = list()
+    controller.renderer.repaint = True
+    controller.wait_for_button = False
+    controller.game_running = True
+    controller.restart = False
     return controller
 
 
-def main():
+def main(args: argparse.Namespace = None):
+    if args is None:
+        args = parse_args([])
+    profiler = FrameProfiler(args.profile_out)
     _build()
-    screen = get_board()
-    controller = Controller(screen=screen)
-    while not controller.quit:
-        controller = game_logic(controller)
-        if controller.quit:
-            break
-        controller = win_logic(controller)
-        if controller.restart:
-            main()
-            return
+    screen = get_board(window_size(args))
+    controller = Controller(screen=screen, strategy=get_strategy(args), speed=args.speed, think_time=args.ai_ms,
+                            profiler=profiler, seed=args.seed, players=("human", args.ai if args.ai != "engine" else "engine:" + args.engine), record_path=args.record)
+    try:
+        while not controller.quit:
+            controller = game_logic(controller)
+            if controller.quit:
+                break
+            controller = win_logic(controller)
+            if controller.restart:
+                controller = restart(controller)
+    finally:
+        # Unfinished games are saved too, even if the game crashed.
+        save_record(controller)
+        controller.worker.close()
+        profiler.close()
 
 
 if __name__ == "__main__":
@@ -862,6 +815,6 @@ if __name__ == "__main__":
     pygame.init()
     print(pygame.display.Info())
     pygame.font.SysFont(None, 30)
-    main()
+    main(parse_args())
     pygame.quit()
     exit()
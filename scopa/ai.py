@@ -0,0 +1,170 @@
+from typing import List, Tuple, Callable
+
+from scopa.belief import Belief
+from scopa.cardset import CardSet, EMPTY, COINS, SEVENS, SETTEBELLO, NAPOLA, bit, card_value, count, lowest
+from scopa.endgame import endgame_action, is_endgame
+from scopa.engine import Action, Event, GameState, current_player, hand, legal_moves, opponent, tally
+
+# What a sure sweep for the other player costs, in option_weight's points, see Wary.
+SWEEP_PENALTY = 10
+
+
+def combine_priorities(*ints) -> int:
+    return sum(ints)
+
+
+def option_weight(card: int, option: CardSet, state: GameState, combiner: Callable = combine_priorities):
+    player = current_player(state)
+    won = tally(state, player)
+    lost = tally(state, opponent(player))
+    winnable = option | bit(card)
+
+    won_golds = won.coins
+    lost_golds = lost.coins
+    winnable_golds = count(winnable & COINS)
+
+    won_napola_cards = won.napola_cards
+    lost_napola_cards = lost.napola_cards
+    winnable_napola_cards = count(winnable & NAPOLA)
+
+    won_sevens = won.sevens
+    lost_sevens = lost.sevens
+    winnable_sevens = count(winnable & SEVENS)
+
+    napola_priority = 0
+    seven_priority = 0
+    gold_seven_priority = 0
+    golds_priority = 0
+    cards_priority = count(winnable)
+    scopa_priority = 10 if state.centre_cards == option else 0
+
+    # TODO: Rewrite napola choosing
+    if winnable_napola_cards:
+        if lost_napola_cards == 3:
+            # Lost napola point, Just stop them getting more golds
+            if winnable_golds:
+                napola_priority = card_value(lowest(winnable & COINS))
+        else:
+            if winnable_napola_cards >= 1:
+                if lost_napola_cards >= 1:
+                    # Stop other player getting napola
+                    napola_priority = (lost_napola_cards + winnable_napola_cards)*2
+                else:
+                    # Can take it easy
+                    napola_priority = winnable_napola_cards
+            if won_napola_cards >= 1:
+                # More incentive to get the napola cards
+                napola_priority = napola_priority * (won_napola_cards + 1)
+            if won_napola_cards == 3:
+                if winnable_golds:
+                    # Grab as many cards as we can get
+                    napola_priority = napola_priority * 3
+
+    if winnable & SETTEBELLO:
+        gold_seven_priority = 10
+
+    if winnable_sevens:
+        if lost_sevens > 2:
+            # Lost the seven point
+            pass
+        elif lost_sevens == 2:
+            # Stop them getting more sevens
+            seven_priority = winnable_sevens * 2
+        else:
+            # Lost sevens is either 0 or 1 so still have a chance
+            if won_sevens >= 2:
+                # Already won the point, no need to prioritze
+                seven_priority = winnable_sevens
+            else:
+                # Won sevens is 0 or 1 so can still win
+                seven_priority = winnable_sevens * 3
+
+    if winnable_golds:
+        if lost_golds > 5:
+            # Lost point
+            pass
+        elif lost_golds == 5:
+                # Stop them getting more golds
+                golds_priority = winnable_golds * 2
+        else:
+            # Lost golds is less than 5 so can still win point
+            if won_golds >= 5:
+                # Already won, no need to prioritize
+                golds_priority = winnable_golds
+            else:
+                # Won golds is 4 or below so can still win
+                golds_priority = winnable_golds * 3
+
+    return combiner(napola_priority, seven_priority, gold_seven_priority, golds_priority, cards_priority, scopa_priority)
+
+
+def decide_option(state: GameState) -> Tuple[int, CardSet]:
+    # Plays for whoever's turn it is in the state.
+    # The last hands are searched exactly instead, see scopa.endgame.
+    if is_endgame(state):
+        return endgame_action(state)
+    player_hand = hand(state, current_player(state))
+    options_dict = dict()
+    for card, option in legal_moves(state):
+        options = options_dict.setdefault(card, list())
+        if option:
+            options.append(option)
+    options_weight_dict = {
+        card: {
+            option_weight(card, option, state): option
+            for option in options_dict[card]
+        }
+        for card in options_dict
+    }
+    tupled = [(card, weight, option) for card in options_weight_dict for weight, option in options_weight_dict[card].items()]
+    if not tupled:
+        if not player_hand:
+            return None, None
+        return lowest(player_hand), EMPTY
+    card, _, option = max(tupled, key=lambda x: x[1])
+    return card, option
+
+
+def card_worth(card: int) -> int:
+    # Roughly what a card is worth to whoever captures it, towards the cards, coins, sevens and settebello points.
+    worth = 1
+    if bit(card) & COINS:
+        worth = worth + 2
+    if bit(card) & SEVENS:
+        worth = worth + 3
+    if bit(card) & SETTEBELLO:
+        worth = worth + 8
+    return worth
+
+
+class Wary:
+    # Plays like decide_option, but weighs each move against what it leaves the other player: a sweep of the
+    # centre, or, for a card played without capturing, that card taken back.
+    # The chances come from a Belief that follows the game through observe, see scopa.belief.
+    def __init__(self, penalty: float = SWEEP_PENALTY):
+        self.penalty = penalty
+        self.belief = Belief()
+
+    def observe(self, events: List[Event]) -> None:
+        self.belief.observe(events)
+
+    def __call__(self, state: GameState) -> Action:
+        if is_endgame(state):
+            return endgame_action(state)
+        moves = legal_moves(state)
+        if not moves:
+            return None, None
+        self.belief.follow(state)
+
+        def value(move: Action) -> float:
+            card, option = move
+            if option:
+                centre = state.centre_cards & ~option
+                return option_weight(card, option, state) - self.penalty * self.belief.sweep_probability(centre)
+            centre = state.centre_cards | bit(card)
+            return -(self.penalty * self.belief.sweep_probability(centre)
+                     + card_worth(card) * self.belief.capture_probability(centre, card))
+
+        # Captures first like decide_option, otherwise the card to leave in the centre.
+        captures = [move for move in moves if move[1]]
+        return max(captures or moves, key=value)
@@ -0,0 +1,87 @@
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from scopa.cardset import COINS, DECK_SIZE, SETTEBELLO, SEVENS, SIXES, indices
+from scopa.engine import GameState
+
+# Columns of the (N, 40) ownership array, in the same order as the CardSet bits.
+COIN_COLUMNS = np.array(list(indices(COINS)))
+SEVEN_COLUMNS = np.array(list(indices(SEVENS)))
+SIX_COLUMNS = np.array(list(indices(SIXES)))
+SETTEBELLO_COLUMN = next(indices(SETTEBELLO))
+
+
+def unpack(masks) -> np.ndarray:
+    # Packed CardSets, one int per game, to an (N, 40) boolean array.
+    masks = np.asarray(masks, dtype=np.uint64).reshape(-1, 1)
+    return ((masks >> np.arange(DECK_SIZE, dtype=np.uint64)) & np.uint64(1)).astype(bool)
+
+
+def from_states(states: Iterable[GameState]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # The lower player's won pile and both scope counts for finished games.
+    lower_won, lower_scope, upper_scope = list(), list(), list()
+    for state in states:
+        lower_won.append(state.lower_won_cards)
+        lower_scope.append(state.lower_tally.scope)
+        upper_scope.append(state.upper_tally.scope)
+    return unpack(lower_won), np.array(lower_scope, dtype=np.int64), np.array(upper_scope, dtype=np.int64)
+
+
+def napola_points(won: np.ndarray) -> np.ndarray:
+    # The run of Coins from the 1, scored when it is at least three long.
+    # A full run of all ten scores nothing, the same as score().
+    coins = won[:, COIN_COLUMNS]
+    run = np.where(coins.all(axis=1), 10, np.argmin(coins, axis=1))
+    return np.where((run >= 3) & (run < 10), run, 0)
+
+
+def results(lower_won: np.ndarray) -> Dict[str, np.ndarray]:
+    # 1 where the lower player wins the category, 0 for a draw and -1 where they lose.
+    cards = lower_won.sum(axis=1)
+    coins = lower_won[:, COIN_COLUMNS].sum(axis=1)
+    sevens = lower_won[:, SEVEN_COLUMNS].sum(axis=1)
+    sixes = lower_won[:, SIX_COLUMNS].sum(axis=1)
+
+    def compare(value: np.ndarray, half: int) -> np.ndarray:
+        return np.sign(value - half)
+
+    # Two sevens go to the sixes, and fewer than two sixes loses rather than going to the ones below.
+    seven_result = np.where(sevens > 2, 1, -1)
+    seven_result = np.where((sevens == 2) & (sixes > 2), 1, seven_result)
+    seven_result = np.where((sevens == 2) & (sixes == 2), 0, seven_result)
+    return {
+        "cards": compare(cards, 20),
+        "coins": compare(coins, 5),
+        "sevens": seven_result,
+        "settebello": np.where(lower_won[:, SETTEBELLO_COLUMN], 1, -1),
+    }
+
+
+def score_batch(lower_won, lower_scope, upper_scope) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    # Scores N finished games at once, matching score() game for game.
+    # lower_won is an (N, 40) boolean array of the cards the lower player won, or N packed CardSets.
+    # Every card is in one of the won piles at the end of a game, so the upper pile is the rest.
+    lower_won = np.asarray(lower_won)
+    if lower_won.ndim == 1:
+        lower_won = unpack(lower_won)
+    lower_won = lower_won.astype(bool, copy=False)
+    upper_won = ~lower_won
+
+    lower_points = {"scopa": np.asarray(lower_scope, dtype=np.int64), "napola": napola_points(lower_won)}
+    upper_points = {"scopa": np.asarray(upper_scope, dtype=np.int64), "napola": napola_points(upper_won)}
+    for name, result in results(lower_won).items():
+        lower_points[name] = (result == 1).astype(np.int64)
+        upper_points[name] = (result == -1).astype(np.int64)
+    return lower_points, upper_points
+
+
+def totals(lower_won, lower_scope, upper_scope) -> Tuple[np.ndarray, np.ndarray]:
+    lower_points, upper_points = score_batch(lower_won, lower_scope, upper_scope)
+    return sum(lower_points.values()), sum(upper_points.values())
+
+
+def find_winners(lower_won, lower_scope, upper_scope) -> np.ndarray:
+    # 1 where the lower player ("You") wins, -1 where the upper player ("Computer") wins and 0 for a draw.
+    lower_total, upper_total = totals(lower_won, lower_scope, upper_scope)
+    return np.sign(lower_total - upper_total)
@@ -0,0 +1,163 @@
+import random
+from typing import List, Optional
+
+import numpy as np
+
+from scopa.captures import MAX_VALUE, capture_options
+from scopa.cardset import ALL_CARDS, CardSet, DECK_SIZE, EMPTY, bit, card_value, count, from_indices, indices
+from scopa.engine import HAND_SIZE, Event, GameState, current_player, hand, opponent
+
+# Passing up a sweep makes each card that would have made it this much less likely to be in the other hand.
+MISSED_SWEEP = 0.25
+
+# Value of each card, by index.
+CARD_VALUES = np.array([card_value(index) for index in range(DECK_SIZE)])
+
+
+def sweep_values(centre: CardSet) -> List[int]:
+    # Values of the cards that capture the whole centre. An empty centre can't be swept.
+    if not centre:
+        return list()
+    return [value for value in range(1, MAX_VALUE + 1) if centre in capture_options(centre, value)]
+
+
+class Belief:
+    # What player knows about the cards they can't see, the other hand and the deck, as a probability per card.
+    # Follows the game from the events of each step, the same ones the front end animates, without peeking at the
+    # cards dealt to the other hand. Each unseen card is as likely as any other to be in the other hand, except that
+    # an opponent who passes up a sweep is taken to be less likely to hold a card that makes it.
+    def __init__(self, player: Optional[str] = None):
+        self.player = player
+        self.reset()
+
+    def reset(self) -> None:
+        self.seen = np.zeros(DECK_SIZE, dtype=bool)
+        # Relative odds of each unseen card being in the other hand rather than the deck.
+        self.weights = np.ones(DECK_SIZE)
+        self.own: CardSet = EMPTY
+        self.centre: CardSet = EMPTY
+        self.opponent_cards = 0
+        self.deck_cards = DECK_SIZE
+
+    def sync(self, state: GameState) -> None:
+        # Starts over from what player can see in state, with no evidence about the other hand.
+        self.player = current_player(state)
+        self.reset()
+        self.own = hand(state, self.player)
+        self.centre = state.centre_cards
+        self.seen[list(indices(self.own | self.centre | state.lower_won_cards | state.upper_won_cards))] = True
+        self.opponent_cards = count(hand(state, opponent(self.player)))
+        self.deck_cards = len(state.deck)
+
+    def follow(self, state: GameState) -> None:
+        # Called by player's strategy before it moves. A belief that missed some events, or that was following the
+        # other seat, starts over from the state.
+        if (self.player != current_player(state) or self.own != hand(state, self.player)
+                or self.centre != state.centre_cards or self.deck_cards != len(state.deck)
+                or self.opponent_cards != count(hand(state, opponent(self.player)))):
+            self.sync(state)
+
+    def observe(self, events: List[Event]) -> None:
+        # The events of one step, or of dealing a new game.
+        if self.player is None:
+            return
+        if any(kind == "deal" and placement == "centre" for kind, _, placement in events):
+            # Only the first deal of a game goes to the centre.
+            self.reset()
+        # Cards that would have swept the centre the other player just played to, until it's known if they did.
+        missed: Optional[np.ndarray] = None
+        for kind, cards, placement in events:
+            if missed is not None and kind != "capture":
+                self.weights[missed] = self.weights[missed] * MISSED_SWEEP
+                missed = None
+            if kind == "deal":
+                self.deck_cards = self.deck_cards - len(cards)
+                if placement == self.player:
+                    self.own = self.own | from_indices(cards)
+                    self.seen[cards] = True
+                elif placement == "centre":
+                    self.centre = self.centre | from_indices(cards)
+                    self.seen[cards] = True
+                else:
+                    if not self.opponent_cards:
+                        # A new hand. The evidence was about the last one, and every card in it has been played.
+                        self.weights[:] = 1.0
+                    self.opponent_cards = self.opponent_cards + len(cards)
+            elif kind == "play":
+                card = cards[0]
+                if self.own & bit(card):
+                    self.own = self.own & ~bit(card)
+                else:
+                    self.opponent_cards = self.opponent_cards - 1
+                    self.seen[card] = True
+                    values = sweep_values(self.centre)
+                    if values:
+                        missed = np.isin(CARD_VALUES, values) & ~self.seen
+                self.centre = self.centre | bit(card)
+            elif kind == "capture":
+                captured = from_indices(cards)
+                if captured == self.centre:
+                    # The card played and everything that was in the centre, a sweep.
+                    missed = None
+                self.centre = self.centre & ~captured
+                self.seen[cards] = True
+        if missed is not None:
+            self.weights[missed] = self.weights[missed] * MISSED_SWEEP
+
+    def hand_probability(self) -> np.ndarray:
+        # Chance of each card being in the other hand, 0 for every card seen.
+        weights = np.where(self.seen, 0.0, self.weights)
+        total = weights.sum()
+        if not total:
+            return weights
+        return np.minimum(weights * (self.opponent_cards / total), 1.0)
+
+    def deck_probability(self) -> np.ndarray:
+        return np.where(self.seen, 0.0, 1.0 - self.hand_probability())
+
+    def next_hand_probability(self) -> np.ndarray:
+        # Chance of each card being in the hand the other player moves from next. With the other hand empty,
+        # that is a new hand from the deck.
+        if self.opponent_cards:
+            return self.hand_probability()
+        unseen = ~self.seen
+        if not self.deck_cards or not unseen.any():
+            return np.zeros(DECK_SIZE)
+        return np.where(unseen, min(HAND_SIZE, self.deck_cards) / unseen.sum(), 0.0)
+
+    def value_probability(self, values: List[int]) -> float:
+        # Chance the other player can play a card of one of values on their next move.
+        if not values:
+            return 0.0
+        chances = self.next_hand_probability()[np.isin(CARD_VALUES, values)]
+        return float(1.0 - np.prod(1.0 - chances))
+
+    def sweep_probability(self, centre: CardSet) -> float:
+        # Chance the other player captures all of centre on their next move.
+        return self.value_probability(sweep_values(centre))
+
+    def capture_probability(self, centre: CardSet, card: int) -> float:
+        # Chance the other player can capture card from centre on their next move.
+        values = [value for value in range(1, MAX_VALUE + 1)
+                  if any(option & bit(card) for option in capture_options(centre, value))]
+        return self.value_probability(values)
+
+    def determinize(self, state: GameState, rng: random.Random) -> GameState:
+        # One guess at the hidden cards, the other hand drawn from the unseen cards by weight.
+        sample = state.copy()
+        seen = hand(state, self.player) | state.centre_cards | state.lower_won_cards | state.upper_won_cards
+        cards = list(indices(ALL_CARDS & ~seen))
+        if (self.weights[cards] == 1.0).all():
+            rng.shuffle(cards)
+        else:
+            # Weighted sampling without replacement: sorting by random() ** (1 / weight) puts each card in the hand
+            # in proportion to its weight.
+            weights = self.weights
+            cards.sort(key=lambda card: rng.random() ** (1.0 / weights[card]), reverse=True)
+        hidden = self.opponent_cards
+        if self.player == "lower":
+            sample.upper_cards = from_indices(cards[:hidden])
+        else:
+            sample.lower_cards = from_indices(cards[:hidden])
+        sample.deck = cards[hidden:]
+        return sample
@@ -0,0 +1,478 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+# Frames are drawn off screen, so this runs the same on a desktop or a headless machine.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from scopa import captures
+from scopa.ai import Wary, decide_option, option_weight, combine_priorities
+from scopa.cardset import count, from_tuples
+from scopa.endgame import solve
+from scopa.engine import GameState, START_DECK_VALUES, calculate_options, legal_moves, new_game, score, step
+from scopa.layout import Layout
+from scopa.perft import perft
+from scopa.tournament import game_deck
+
+# A case is slower than its baseline when its median grows by more than this fraction.
+THRESHOLD = 0.2
+
+# Each timing sample runs for at least this long.
+SAMPLE_TIME = 0.05
+
+# The restart check plays this many games, and fails if traced memory grows by more than MEMORY_LIMIT_KB.
+RESTARTS = 100
+MEMORY_LIMIT_KB = 256
+
+# Deep enough to reach the second deal.
+PERFT_DEPTH = 9
+
+SIZE_720P = (1280, 720)
+SIZE_4K = (3840, 2160)
+
+# Twelve cards worth 1 to 3 have the most subsets that add up to 10 or less.
+WORST_CENTRE = from_tuples([(value, suit) for value in (1, 2, 3) for suit in ("Coins", "Cups", "Swords", "Clubs")])
+
+# A centre a 7 can take from in several ways, like a real busy turn.
+BUSY_CENTRE = from_tuples([(1, "Coins"), (2, "Cups"), (3, "Swords"), (4, "Clubs"), (5, "Coins"), (6, "Cups")])
+
+# Bench functions return a callable that does some work and the number of calls it makes.
+Bench = Callable[[], Tuple[Callable[[], None], int]]
+
+BENCHES: Dict[str, Bench] = dict()
+
+
+def bench(name: str) -> Callable[[Bench], Bench]:
+    def register(func: Bench) -> Bench:
+        BENCHES[name] = func
+        return func
+    return register
+
+
+def seeded_games(games: int = 20, seed: int = 0) -> Tuple[List[GameState], List[GameState]]:
+    # Every position from a few greedy games, and the finished games.
+    positions = list()
+    finished = list()
+    for pair in range(games):
+        state, _ = new_game(game_deck(seed, pair))
+        while not state.game_over:
+            positions.append(state.copy())
+            step(state, decide_option(state))
+        finished.append(state)
+    return positions, finished
+
+
+@bench("calculate_options_cold")
+def calculate_options_cold():
+    def run():
+        captures._INDEX.clear()
+        for value in range(1, 11):
+            calculate_options(value - 1, WORST_CENTRE)
+    return run, 10
+
+
+@bench("calculate_options_warm")
+def calculate_options_warm():
+    calculate_options(0, WORST_CENTRE)
+
+    def run():
+        for value in range(1, 11):
+            calculate_options(value - 1, WORST_CENTRE)
+    return run, 10
+
+
+@bench("decide_option")
+def decide_option_bench():
+    positions, _ = seeded_games()
+
+    def run():
+        for state in positions:
+            decide_option(state)
+    return run, len(positions)
+
+
+@bench("wary")
+def wary_bench():
+    # Each position is new to the belief, so this includes setting it up from the state.
+    positions, _ = seeded_games()
+    wary = Wary()
+
+    def run():
+        for state in positions:
+            wary(state)
+    return run, len(positions)
+
+
+@bench("endgame_solve")
+def endgame_solve_bench():
+    # The first position of each last hand, with three cards each still to play.
+    positions, _ = seeded_games()
+    positions = [state for state in positions if not state.deck and count(state.lower_cards) == count(state.upper_cards) == 3]
+
+    def run():
+        for state in positions:
+            solve(state)
+    return run, len(positions)
+
+
+@bench("option_weight")
+def option_weight_bench():
+    positions, _ = seeded_games()
+    weights = [(card, option, state) for state in positions for card, option in legal_moves(state) if option]
+
+    def run():
+        for card, option, state in weights:
+            option_weight(card, option, state, combine_priorities)
+    return run, len(weights)
+
+
+@bench("legal_moves")
+def legal_moves_bench():
+    positions, _ = seeded_games()
+
+    def run():
+        for state in positions:
+            legal_moves(state)
+    return run, len(positions)
+
+
+@bench("perft")
+def perft_bench():
+    # Timed per position counted, so the median is the inverse of nodes per second.
+    state, _ = new_game(game_deck(0, 0))
+    nodes = perft(state, PERFT_DEPTH)
+
+    def run():
+        perft(state, PERFT_DEPTH)
+    return run, nodes
+
+
+@bench("score")
+def score_bench():
+    _, finished = seeded_games()
+
+    def run():
+        for state in finished:
+            score(state)
+    return run, len(finished)
+
+
+def board(size: Tuple[int, int] = None):
+    import scopa.__main__ as game
+    size = size if size is not None else (game.WIDTH, game.HEIGHT)
+    if not pygame.display.get_init():
+        pygame.init()
+    surface = pygame.display.get_surface()
+    if surface is None or surface.get_size() != size:
+        game.get_board(size)
+    return game
+
+
+@bench("card_construction")
+def card_construction():
+    game = board()
+    layout = Layout(*pygame.display.get_surface().get_size())
+
+    def run():
+        for suit, value in START_DECK_VALUES:
+            game.Card(suit, value, (layout.deck_x, layout.deck_y), layout.card_size())
+    return run, len(START_DECK_VALUES)
+
+
+@bench("option_buttons")
+def option_buttons():
+    # The buttons for a turn with several ways to capture, made again every turn.
+    game = board()
+    layout = Layout(*pygame.display.get_surface().get_size())
+    card = game.Card("Coins", 7, (layout.deck_x, layout.deck_y), layout.card_size())
+    options = calculate_options(card.index(), BUSY_CENTRE)
+
+    def run():
+        for option in options:
+            game.OptionButton(layout.width, layout.height/2, card, option, layout)
+    return run, len(options)
+
+
+def dealt_controller(size: Tuple[int, int] = None):
+    # A controller with the first deal landed and nothing moving.
+    game = board(size)
+    controller = game.Controller(pygame.display.get_surface(), speed=0)
+    controller.worker.close()
+    while controller.events or controller.tweener.busy():
+        if controller.tweener.busy():
+            controller.tweener.update()
+        else:
+            controller = game.animate_event(controller)
+    game.draw_controller(controller)
+    return game, controller
+
+
+def full_frames(size: Tuple[int, int] = None):
+    game, controller = dealt_controller(size)
+
+    def run():
+        controller.renderer.repaint = True
+        game.draw_controller(controller)
+    return run, 1
+
+
+def moving_frames(size: Tuple[int, int] = None):
+    # One card dragged across the table, the usual frame while something moves.
+    game, controller = dealt_controller(size)
+    card = game.sprites(controller, controller.lower_cards)[0]
+    x, y = card.rect.center
+    step = controller.layout.scaled(4)
+    frame = [0]
+
+    def run():
+        frame[0] = (frame[0] + 1) % 100
+        card.set_position(x + frame[0] * step, y - frame[0] * step)
+        game.draw_controller(controller)
+    return run, 1
+
+
+@bench("draw_controller_full")
+def draw_controller_full():
+    return full_frames()
+
+
+@bench("draw_controller_moving")
+def draw_controller_moving():
+    return moving_frames()
+
+
+@bench("draw_controller_idle")
+def draw_controller_idle():
+    game, controller = dealt_controller()
+
+    def run():
+        game.draw_controller(controller)
+    return run, 1
+
+
+@bench("draw_controller_full_720p")
+def draw_controller_full_720p():
+    return full_frames(SIZE_720P)
+
+
+@bench("draw_controller_moving_720p")
+def draw_controller_moving_720p():
+    return moving_frames(SIZE_720P)
+
+
+@bench("draw_controller_full_4k")
+def draw_controller_full_4k():
+    return full_frames(SIZE_4K)
+
+
+@bench("draw_controller_moving_4k")
+def draw_controller_moving_4k():
+    return moving_frames(SIZE_4K)
+
+
+def play_headless(game, controller) -> None:
+    # Greedy in both seats, no input and no worker thread, drawing every frame like the real loop.
+    while controller.game_running:
+        if controller.tweener.busy():
+            controller.tweener.update()
+        elif controller.events:
+            controller = game.animate_event(controller)
+        elif controller.state.game_over:
+            controller.game_running = False
+        else:
+            controller = game.play_card(controller, *decide_option(controller.state))
+        game.draw_controller(controller)
+
+
+def live_sprites() -> int:
+    # Surface pixels are allocated by SDL where tracemalloc can't see them, so the sprites holding them are counted too.
+    return sum(1 for thing in gc.get_objects() if isinstance(thing, pygame.sprite.Sprite))
+
+
+def memory_check(restarts: int = RESTARTS, warmup: int = 5) -> Dict:
+    # Plays whole games through the results screen and restart, the way a long running session does.
+    game = board()
+    controller = game.Controller(pygame.display.get_surface(), speed=0)
+
+    def play(games: int):
+        nonlocal controller
+        for _ in range(games):
+            play_headless(game, controller)
+            game.results(controller)
+            controller = game.restart(controller)
+
+    # Fills the caches first, they are meant to grow up to their limits.
+    play(warmup)
+    gc.collect()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    sprites = live_sprites()
+    threads = threading.active_count()
+    play(restarts)
+    gc.collect()
+    end, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        "restarts": restarts,
+        "start_kb": start / 1024,
+        "end_kb": end / 1024,
+        "peak_kb": peak / 1024,
+        "growth_kb": (end - start) / 1024,
+        "limit_kb": MEMORY_LIMIT_KB,
+        "sprites_before": sprites,
+        "sprites_after": live_sprites(),
+        "threads_before": threads,
+        "threads_after": threading.active_count(),
+    }
+    controller.worker.close()
+    return result
+
+
+def memory_failures(result: Dict) -> List[str]:
+    failures = list()
+    if result["growth_kb"] > result["limit_kb"]:
+        failures.append(f"traced memory grew {result['growth_kb']:.1f} KB over {result['restarts']} restarts")
+    if result["sprites_after"] > result["sprites_before"]:
+        failures.append(f"live sprites went from {result['sprites_before']} to {result['sprites_after']}")
+    if result["threads_after"] > result["threads_before"]:
+        failures.append(f"threads went from {result['threads_before']} to {result['threads_after']}")
+    return failures
+
+
+def measure(func: Callable[[], None], calls: int, repeat: int, sample_time: float) -> Dict:
+    # Like timeit.autorange, the number of runs per sample grows until a sample takes long enough.
+    func()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= sample_time:
+            break
+        number = number * 2 if elapsed <= 0 else max(number * 2, int(number * sample_time / elapsed) + 1)
+    samples = [elapsed]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append(time.perf_counter() - start)
+    per_call = [sample / (number * calls) * 1e6 for sample in samples]
+    return {
+        "median_us": statistics.median(per_call),
+        "min_us": min(per_call),
+        "max_us": max(per_call),
+        "calls": number * calls * repeat,
+    }
+
+
+def run(names: List[str] = None, repeat: int = 5, sample_time: float = SAMPLE_TIME) -> Dict:
+    results = dict()
+    for name in names or list(BENCHES):
+        func, calls = BENCHES[name]()
+        results[name] = measure(func, calls, repeat, sample_time)
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = THRESHOLD) -> List[Tuple[str, float, float, float]]:
+    # (name, baseline, current, ratio) for every case slower than the baseline by more than threshold.
+    regressions = list()
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["median_us"]
+        after = result["median_us"]
+        ratio = after / before if before > 0 else float("inf")
+        if ratio > 1 + threshold:
+            regressions.append((name, before, after, ratio))
+    return regressions
+
+
+def report(current: Dict, baseline: Dict = None) -> str:
+    lines = [f"{'case':<26}{'median us':>14}{'min us':>14}{'baseline us':>14}{'change':>10}"]
+    for name, result in current["results"].items():
+        line = f"{name:<26}{result['median_us']:>14.3f}{result['min_us']:>14.3f}"
+        if baseline is not None and name in baseline["results"]:
+            before = baseline["results"][name]["median_us"]
+            line = line + f"{before:>14.3f}{(result['median_us'] / before - 1) * 100:>+9.1f}%"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="scopa.benchmark", description="Time the game's hot paths.")
+    parser.add_argument("cases", nargs="*", help=f"Cases to run, all by default: {', '.join(BENCHES)}.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing samples per case.")
+    parser.add_argument("--sample-time", type=float, default=SAMPLE_TIME, help="Minimum seconds per sample.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    parser.add_argument("--save", metavar="PATH", help="Write the results to PATH, to use as a baseline later.")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against results saved with --save.")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="Allowed slowdown against the baseline before failing, 0.2 is 20%%.")
+    parser.add_argument("--memory", action="store_true",
+                        help=f"Instead of timing, check memory stays flat over {RESTARTS} game restarts.")
+    parser.add_argument("--restarts", type=int, default=RESTARTS, help="Restarts for --memory.")
+    args = parser.parse_args(argv)
+    for name in args.cases:
+        if name not in BENCHES:
+            parser.error(f"Unknown case {name!r}, expected one of {', '.join(BENCHES)}")
+    return args
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    if args.memory:
+        result = memory_check(args.restarts)
+        failures = memory_failures(result)
+        if args.json:
+            result["failures"] = failures
+            print(json.dumps(result, indent=2))
+        else:
+            print(f"{result['restarts']} restarts: traced memory {result['start_kb']:.1f} KB -> {result['end_kb']:.1f} KB "
+                  f"({result['growth_kb']:+.1f} KB, limit {result['limit_kb']} KB), peak {result['peak_kb']:.1f} KB")
+            print(f"sprites {result['sprites_before']} -> {result['sprites_after']}, "
+                  f"threads {result['threads_before']} -> {result['threads_after']}")
+            for failure in failures:
+                print(f"LEAK {failure}")
+        return 1 if failures else 0
+
+    current = run(args.cases, args.repeat, args.sample_time)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(current, file, indent=2)
+
+    regressions = compare(current, baseline, args.threshold) if baseline is not None else list()
+    if args.json:
+        current["threshold"] = args.threshold
+        current["regressions"] = [name for name, _, _, _ in regressions]
+        print(json.dumps(current, indent=2))
+    else:
+        print(report(current, baseline))
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSION {name}: {before:.3f}us -> {after:.3f}us ({(ratio - 1) * 100:+.1f}%)")
+    # Non zero when something got slower, so scripts and CI can fail on it.
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import argparse
+import sys
+import threading
+import time
+from typing import List, Optional
+
+from scopa.engine import GameState
+from scopa.protocol import format_move, parse_position
+from scopa.strategies import make_strategy
+
+
+class Bot:
+    # Plays one of the built-in strategies over the engine protocol in scopa.protocol, and shows what an engine does.
+    # Thinks on its own thread so it can still read stop while it thinks.
+    def __init__(self, spec: str, out=sys.stdout):
+        self.spec = spec
+        self.strategy = make_strategy(spec)
+        if hasattr(self.strategy, "milliseconds"):
+            # The host's time limit takes over from the strategy's own.
+            self.strategy.milliseconds = None
+        self.out = out
+        self.lock = threading.Lock()
+        self.state: Optional[GameState] = None
+        self.stop = threading.Event()
+        self.thinking: Optional[threading.Thread] = None
+
+    def say(self, line: str) -> None:
+        with self.lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def go(self, words: List[str]) -> None:
+        self.wait()
+        stop = threading.Event()
+        self.stop = stop
+        state = self.state
+        deadline = time.perf_counter() + float(words[2]) / 1000 if words[1:2] == ["movetime"] else None
+
+        def should_stop() -> bool:
+            return stop.is_set() or (deadline is not None and time.perf_counter() >= deadline)
+
+        def think() -> None:
+            if hasattr(self.strategy, "search"):
+                action = self.strategy.search(state, should_stop)
+            else:
+                action = self.strategy(state)
+            self.say("bestmove " + format_move(action))
+
+        self.thinking = threading.Thread(target=think, name="scopa-bot", daemon=True)
+        self.thinking.start()
+
+    def wait(self) -> None:
+        if self.thinking is not None:
+            self.thinking.join()
+            self.thinking = None
+
+    def handle(self, line: str) -> bool:
+        # False once told to quit.
+        words = line.split()
+        if not words:
+            return True
+        command = words[0]
+        if command == "scopa":
+            self.say(f"id name scopa.bot {self.spec}")
+            self.say("scopaok")
+        elif command == "isready":
+            self.say("readyok")
+        elif command == "position":
+            self.state = parse_position(line)
+        elif command == "go":
+            self.go(words)
+        elif command == "stop":
+            self.stop.set()
+            self.wait()
+        elif command == "quit":
+            return False
+        return True
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog="scopa.bot", description="A built-in strategy as an external engine.")
+    parser.add_argument("strategy", nargs="?", default="greedy", help="e.g. greedy, random or ismcts.")
+    args = parser.parse_args(argv)
+    bot = Bot(args.strategy)
+    for line in sys.stdin:
+        if not bot.handle(line):
+            break
+    bot.stop.set()
+    bot.wait()
+
+
+if __name__ == "__main__":
+    main()
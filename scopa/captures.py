@@ -0,0 +1,58 @@
+import collections
+from typing import List, Tuple
+
+from scopa.cardset import CardSet, EMPTY, card_value, indices
+
+MAX_VALUE = 10
+
+# Centres kept, least recently used dropped first. An entry is about 800 bytes, so this holds the index to about
+# 13 MB per process, while the centres of the games being played stay in it.
+CACHE_LIMIT = 1 << 14
+
+Options = Tuple[CardSet, ...]
+
+# Centre cards -> legal captures for each played value 0-10, already filtered by valid_options.
+_INDEX: "collections.OrderedDict[CardSet, Tuple[Options, ...]]" = collections.OrderedDict()
+
+
+def valid_options(options: List[CardSet]) -> Options:
+    # A card that matches a single centre card has to take that card.
+    singles = [option for option in options if option & (option - 1) == 0]
+    if singles:
+        return tuple(singles)
+    return tuple(options)
+
+
+def build_captures(centre: CardSet) -> Tuple[Options, ...]:
+    found: List[List[CardSet]] = [list() for _ in range(MAX_VALUE + 1)]
+    cards = list(indices(centre))
+
+    # Same order as walking the subsets depth first, lowest card index first.
+    def func(start: int, partial: CardSet, partial_sum: int):
+        for i in range(start, len(cards)):
+            total = partial_sum + card_value(cards[i])
+            if total > MAX_VALUE:
+                continue
+            option = partial | 1 << cards[i]
+            found[total].append(option)
+            if total < MAX_VALUE:
+                func(i + 1, option, total)
+
+    func(0, EMPTY, 0)
+    return tuple(valid_options(options) for options in found)
+
+
+def capture_options(centre: CardSet, value: int) -> Options:
+    table = _INDEX.get(centre)
+    if table is None:
+        if len(_INDEX) >= CACHE_LIMIT:
+            _INDEX.popitem(last=False)
+        table = build_captures(centre)
+        _INDEX[centre] = table
+    else:
+        _INDEX.move_to_end(centre)
+    return table[value]
+
+
+def clear_index() -> None:
+    _INDEX.clear()
@@ -0,0 +1,95 @@
+from typing import Iterable, Iterator, Tuple
+
+SUITS = ("Coins", "Clubs", "Cups", "Swords",)
+VALUES = range(1, 11)
+
+SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+
+# A set of cards is an int with bit i set for the card with index i.
+# Card i is value i % 10 + 1 of suit SUITS[i // 10], so Coins are bits 0-9.
+CardSet = int
+
+EMPTY = 0
+DECK_SIZE = 40
+ALL_CARDS = (1 << DECK_SIZE) - 1
+
+
+def card_index(value: int, suit: str) -> int:
+    return SUIT_INDEX[suit] * 10 + value - 1
+
+
+def card_value(index: int) -> int:
+    return index % 10 + 1
+
+
+def card_suit(index: int) -> str:
+    return SUITS[index // 10]
+
+
+def card_tuple(index: int) -> Tuple[int, str]:
+    return card_value(index), card_suit(index)
+
+
+def card_string(index: int) -> str:
+    return f"{card_value(index)} of {card_suit(index)}"
+
+
+def bit(index: int) -> CardSet:
+    return 1 << index
+
+
+def contains(cards: CardSet, index: int) -> bool:
+    return cards >> index & 1 == 1
+
+
+def add(cards: CardSet, index: int) -> CardSet:
+    return cards | 1 << index
+
+
+def remove(cards: CardSet, index: int) -> CardSet:
+    return cards & ~(1 << index)
+
+
+if hasattr(int, "bit_count"):
+    count = int.bit_count
+else:
+    def count(cards: CardSet) -> int:
+        return bin(cards).count("1")
+
+
+def lowest(cards: CardSet) -> int:
+    return (cards & -cards).bit_length() - 1
+
+
+def indices(cards: CardSet) -> Iterator[int]:
+    while cards:
+        low = cards & -cards
+        yield low.bit_length() - 1
+        cards ^= low
+
+
+def from_indices(cards: Iterable[int]) -> CardSet:
+    result = EMPTY
+    for index in cards:
+        result |= 1 << index
+    return result
+
+
+def from_tuples(cards: Iterable[Tuple[int, str]]) -> CardSet:
+    return from_indices(card_index(value, suit) for value, suit in cards)
+
+
+def to_string(cards: CardSet) -> str:
+    return ', '.join(card_string(index) for index in indices(cards))
+
+
+def _value_mask(value: int) -> CardSet:
+    return from_indices(card_index(value, suit) for suit in SUITS)
+
+
+COINS = from_indices(card_index(value, "Coins") for value in VALUES)
+SEVENS = _value_mask(7)
+SIXES = _value_mask(6)
+SETTEBELLO = bit(card_index(7, "Coins"))
+NAPOLA = from_indices(card_index(value, "Coins") for value in (1, 2, 3))
+VALUE_MASKS = {value: _value_mask(value) for value in VALUES}
@@ -0,0 +1,138 @@
+import random
+from typing import Dict, List, Optional, Tuple
+
+from scopa.cardset import DECK_SIZE, count, indices
+from scopa.engine import Action, GameState, current_player, hand, legal_moves, score, step
+
+# Once the deck is empty, every card not in your hand, the centre or a won pile is in the other hand.
+# The last hands are then a game of perfect information, small enough to search to the end.
+
+# Zobrist keys, a position's key is the XOR of the keys for where each card is and the rest of the state that matters.
+LOWER_HAND, UPPER_HAND, CENTRE, LOWER_WON, UPPER_WON = range(5)
+_RNG = random.Random(0x5C09A)
+CARD_KEYS = [[_RNG.getrandbits(64) for _ in range(DECK_SIZE)] for _ in range(5)]
+# By lower then upper and the number of scope, there can't be more than one per play.
+SCOPE_KEYS = [[_RNG.getrandbits(64) for _ in range(DECK_SIZE + 1)] for _ in range(2)]
+UPPER_TO_PLAY = _RNG.getrandbits(64)
+LOWER_LAST_WON = _RNG.getrandbits(64)
+
+# What a transposition table value is, the search window can cut a node short before its exact value is known.
+EXACT, LOWER_BOUND, UPPER_BOUND = range(3)
+
+# Entries are (value, bound, best action).
+Table = Dict[int, Tuple[int, int, Optional[Action]]]
+
+
+def is_endgame(state: GameState) -> bool:
+    return not state.deck and not state.game_over and bool(hand(state, current_player(state)))
+
+
+def position_key(state: GameState) -> int:
+    key = 0
+    places = (state.lower_cards, state.upper_cards, state.centre_cards, state.lower_won_cards, state.upper_won_cards)
+    for place, cards in enumerate(places):
+        for card in indices(cards):
+            key ^= CARD_KEYS[place][card]
+    key ^= SCOPE_KEYS[0][state.lower_tally.scope] ^ SCOPE_KEYS[1][state.upper_tally.scope]
+    if not state.player_1_turn:
+        key ^= UPPER_TO_PLAY
+    if state.player_last_won:
+        key ^= LOWER_LAST_WON
+    return key
+
+
+def play_key(state: GameState, key: int, action: Action) -> int:
+    # The key after action is played in state, without playing it. Only for plays that don't end the game.
+    card, option = action
+    lower = state.player_1_turn
+    key ^= UPPER_TO_PLAY ^ CARD_KEYS[LOWER_HAND if lower else UPPER_HAND][card]
+    if not option:
+        return key ^ CARD_KEYS[CENTRE][card]
+    won = LOWER_WON if lower else UPPER_WON
+    key ^= CARD_KEYS[won][card]
+    for captured in indices(option):
+        key ^= CARD_KEYS[CENTRE][captured] ^ CARD_KEYS[won][captured]
+    if option == state.centre_cards:
+        side = 0 if lower else 1
+        scope = state.lower_tally.scope if lower else state.upper_tally.scope
+        key ^= SCOPE_KEYS[side][scope] ^ SCOPE_KEYS[side][scope + 1]
+    if lower != state.player_last_won:
+        key ^= LOWER_LAST_WON
+    return key
+
+
+def points(state: GameState) -> int:
+    # Lower's points minus upper's, for a finished game.
+    lower_scores, upper_scores = score(state)
+    return sum(lower_scores.values()) - sum(upper_scores.values())
+
+
+def ordered(actions: List[Action], state: GameState, first: Optional[Action]) -> List[Action]:
+    # The best move from an earlier visit, then scope, then the biggest captures. Good moves first make for more cut offs.
+    centre = state.centre_cards
+
+    def order(action: Action) -> Tuple[bool, bool, int]:
+        _, option = action
+        return action != first, not (option and option == centre), -count(option)
+    return sorted(actions, key=order)
+
+
+def search(state: GameState, key: int, alpha: int, beta: int, table: Table) -> int:
+    # Alpha-beta, lower maximises points() and upper minimises it.
+    first = None
+    entry = table.get(key)
+    if entry is not None:
+        value, bound, first = entry
+        if bound == EXACT:
+            return value
+        if bound == LOWER_BOUND:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    window = (alpha, beta)
+    maximising = state.player_1_turn
+    best_value = None
+    best_action = None
+    for action in ordered(legal_moves(state), state, first):
+        child = state.copy()
+        step(child, action)
+        if child.game_over:
+            value = points(child)
+        else:
+            value = search(child, play_key(state, key, action), alpha, beta, table)
+        if best_value is None or (value > best_value if maximising else value < best_value):
+            best_value = value
+            best_action = action
+        if maximising:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            break
+
+    if best_value <= window[0]:
+        bound = UPPER_BOUND
+    elif best_value >= window[1]:
+        bound = LOWER_BOUND
+    else:
+        bound = EXACT
+    table[key] = (best_value, bound, best_action)
+    return best_value
+
+
+def solve(state: GameState, table: Table = None) -> Tuple[int, Action]:
+    # The final points difference (lower minus upper) with best play from both sides, and the move that gets it.
+    table = table if table is not None else dict()
+    key = position_key(state)
+    # Wider than any points difference, so the root's value is exact.
+    limit = 2 * DECK_SIZE
+    value = search(state, key, -limit, limit, table)
+    return value, table[key][2]
+
+
+def endgame_action(state: GameState) -> Action:
+    _, action = solve(state)
+    return action
@@ -0,0 +1,287 @@
+import random
+from typing import List, Dict, Tuple, Callable, Optional
+
+from scopa.cardset import CardSet, EMPTY, SUITS, VALUES, bit, card_index, card_value, contains, indices
+from scopa.captures import Options, capture_options
+from scopa.tally import Tally
+
+START_DECK_VALUES = [
+    (suit, value)
+    for suit in SUITS
+    for value in VALUES
+]
+
+HAND_SIZE = 3
+CENTRE_SIZE = 4
+
+# Scoring categories, in the order they are shown.
+CATEGORIES = ("scopa", "napola", "cards", "coins", "sevens", "settebello")
+
+# A play is the card index from the hand and the centre cards it captures (EMPTY if it captures nothing).
+Action = Tuple[int, Optional[CardSet]]
+# What happened to the cards, in order, so a front end can animate it.
+# Of the form: kind ("deal", "play" or "capture"), card indices, placement.
+Event = Tuple[str, List[int], str]
+
+
+def new_seed() -> int:
+    # Fits in a game record.
+    return random.getrandbits(63)
+
+
+def seeded_deck(seed: int) -> List[Tuple[str, int]]:
+    # The same seed always gives the same shuffle, so a game can be played again from its seed.
+    return random.Random(seed).sample(START_DECK_VALUES, 40)
+
+
+def deck_indices(deck_values: List[Tuple[str, int]]) -> List[int]:
+    return [card_index(value, suit) for suit, value in deck_values]
+
+
+class GameState:
+    def __init__(self, deck_values: List[Tuple[str, int]] = None):
+        if deck_values is None:
+            deck_values = random.sample(START_DECK_VALUES, 40)
+        # Card indices, dealt from the end.
+        self.deck: List[int] = deck_indices(deck_values)
+
+        self.lower_cards: CardSet = EMPTY
+        self.upper_cards: CardSet = EMPTY
+        self.centre_cards: CardSet = EMPTY
+        self.lower_won_cards: CardSet = EMPTY
+        self.upper_won_cards: CardSet = EMPTY
+
+        # Counts for scoring each won pile, including scope, updated as cards are captured.
+        self.lower_tally = Tally()
+        self.upper_tally = Tally()
+
+        self.player_1_turn = True
+        self.player_last_won = False
+        self.first_deal = True
+        self.game_over = False
+
+    def copy(self) -> "GameState":
+        state = GameState.__new__(GameState)
+        state.__dict__.update(self.__dict__)
+        state.deck = list(self.deck)
+        state.lower_tally = self.lower_tally.copy()
+        state.upper_tally = self.upper_tally.copy()
+        return state
+
+
+def current_player(state: GameState) -> str:
+    return "lower" if state.player_1_turn else "upper"
+
+
+def hand(state: GameState, player: str) -> CardSet:
+    return state.lower_cards if player == "lower" else state.upper_cards
+
+
+def won_cards(state: GameState, player: str) -> CardSet:
+    return state.lower_won_cards if player == "lower" else state.upper_won_cards
+
+
+def tally(state: GameState, player: str) -> Tally:
+    return state.lower_tally if player == "lower" else state.upper_tally
+
+
+def opponent(player: str) -> str:
+    return "upper" if player == "lower" else "lower"
+
+
+def calculate_options(card: int, centre_cards: CardSet) -> Options:
+    return capture_options(centre_cards, card_value(card))
+
+
+def legal_moves(state: GameState, card: int = None) -> List[Action]:
+    # Every play the player to move can make, or only those of card. A card that can capture has to,
+    # one of the ways in calculate_options, and plays to the centre otherwise.
+    actions = list()
+    cards = hand(state, current_player(state))
+    if card is not None:
+        cards = cards & bit(card)
+    for played in indices(cards):
+        options = calculate_options(played, state.centre_cards)
+        if options:
+            actions.extend((played, option) for option in options)
+        else:
+            actions.append((played, EMPTY))
+    return actions
+
+
+def deal(state: GameState) -> List[Event]:
+    events = list()
+    for _ in range(HAND_SIZE):
+        card = state.deck.pop()
+        state.lower_cards |= bit(card)
+        events.append(("deal", [card], "lower"))
+        card = state.deck.pop()
+        state.upper_cards |= bit(card)
+        events.append(("deal", [card], "upper"))
+    if state.first_deal:
+        for _ in range(CENTRE_SIZE):
+            card = state.deck.pop()
+            state.centre_cards |= bit(card)
+            events.append(("deal", [card], "centre"))
+        state.first_deal = False
+    return events
+
+
+def finish(state: GameState) -> List[Event]:
+    # Whoever captured last takes what is left in the centre.
+    events = list()
+    if state.centre_cards:
+        left = state.centre_cards
+        if state.player_last_won:
+            state.lower_won_cards |= left
+            state.lower_tally.add(left, state.lower_won_cards)
+            events.append(("capture", list(indices(left)), "lower_won"))
+        else:
+            state.upper_won_cards |= left
+            state.upper_tally.add(left, state.upper_won_cards)
+            events.append(("capture", list(indices(left)), "upper_won"))
+        state.centre_cards = EMPTY
+    state.game_over = True
+    return events
+
+
+def step(state: GameState, action: Action) -> List[Event]:
+    card, option = action
+    player = current_player(state)
+    if state.game_over:
+        raise ValueError("The game is over")
+    if not contains(hand(state, player), card):
+        raise ValueError(f"{card} is not in the {player} hand")
+    options = calculate_options(card, state.centre_cards)
+    if option:
+        if option not in options:
+            raise ValueError(f"{card} cannot capture {option}")
+    elif options:
+        raise ValueError(f"{card} has to capture one of {options}")
+
+    scopa = bool(option) and option == state.centre_cards
+    captured = option | bit(card) if option else EMPTY
+    events = [("play", [card], "centre")]
+    if player == "lower":
+        state.lower_cards &= ~bit(card)
+        if captured:
+            state.lower_won_cards |= captured
+            state.lower_tally.add(captured, state.lower_won_cards)
+            state.lower_tally.scope = state.lower_tally.scope + scopa
+            state.player_last_won = True
+    else:
+        state.upper_cards &= ~bit(card)
+        if captured:
+            state.upper_won_cards |= captured
+            state.upper_tally.add(captured, state.upper_won_cards)
+            state.upper_tally.scope = state.upper_tally.scope + scopa
+            state.player_last_won = False
+    if captured:
+        state.centre_cards &= ~option
+        events.append(("capture", list(indices(option)) + [card], player + "_won"))
+    else:
+        state.centre_cards |= bit(card)
+
+    state.player_1_turn = not state.player_1_turn
+    if not state.lower_cards and not state.upper_cards:
+        if state.deck:
+            events = events + deal(state)
+        else:
+            events = events + finish(state)
+    return events
+
+
+def new_game(deck_values: List[Tuple[str, int]] = None) -> Tuple[GameState, List[Event]]:
+    state = GameState(deck_values)
+    return state, deal(state)
+
+
+def play_game(lower_strategy: Callable, upper_strategy: Callable, deck_values: List[Tuple[str, int]] = None,
+              actions: List[Action] = None) -> GameState:
+    # Plays a whole game with no front end, strategies take the state and return an action.
+    # Strategies with an observe(events) method are also shown what happens, as a front end would be.
+    # Each action played is added to actions if given.
+    observers = list()
+    for strategy in (lower_strategy, upper_strategy):
+        if hasattr(strategy, "observe") and strategy not in observers:
+            observers.append(strategy)
+    state, events = new_game(deck_values)
+    for observer in observers:
+        observer.observe(events)
+    while not state.game_over:
+        strategy = lower_strategy if state.player_1_turn else upper_strategy
+        action = strategy(state)
+        events = step(state, action)
+        for observer in observers:
+            observer.observe(events)
+        if actions is not None:
+            actions.append(action)
+    return state
+
+
+def score(state: GameState) -> Tuple[Dict[str, int], Dict[str, int]]:
+    # Only reads the tallies, the won piles are never rescanned.
+    def cards(lower: Tally) -> str:
+        length = lower.cards
+        if length > 20:
+            return "Win"
+        elif length == 20:
+            return "Draw"
+        else:
+            return "Lose"
+
+    def coins(lower: Tally) -> str:
+        length = lower.coins
+        if length > 5:
+            return "Win"
+        elif length == 5:
+            return "Draw"
+        else:
+            return "Lose"
+
+    def settebello(lower: Tally) -> str:
+        return "Win" if lower.settebello else "Lose"
+
+    def sevens(lower: Tally) -> str:
+        seven = lower.sevens
+        if seven > 2:
+            return "Win"
+        elif seven == 2:
+            sixes = lower.sixes
+            if sixes > 2:
+                return "Win"
+            if sixes == 2:
+                return "Draw"
+        else:
+            return "Lose"
+
+    lower = state.lower_tally
+    upper = state.upper_tally
+
+    lower_points = {"scopa": lower.scope, "napola": lower.napola_points()}
+    upper_points = {"scopa": upper.scope, "napola": upper.napola_points()}
+
+    for func in (cards, coins, sevens, settebello):
+        result = func(lower)
+        if result == "Win":
+            lower_points[func.__name__] = 1
+            upper_points[func.__name__] = 0
+        elif result == "Draw":
+            lower_points[func.__name__] = 0
+            upper_points[func.__name__] = 0
+        else:
+            lower_points[func.__name__] = 0
+            upper_points[func.__name__] = 1
+    return lower_points, upper_points
+
+
+def find_winner(state: GameState) -> Tuple[str, Dict[str, int], Dict[str, int]]:
+    lower_scores, upper_scores = score(state)
+    lower_points = sum(lower_scores.values())
+    upper_points = sum(upper_scores.values())
+    if lower_points > upper_points:
+        return "You", lower_scores, upper_scores
+    elif lower_points < upper_points:
+        return "Computer", lower_scores, upper_scores
+    else:
+        return "Draw", lower_scores, upper_scores
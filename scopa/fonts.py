@@ -0,0 +1,63 @@
+import collections
+from typing import Dict, Hashable, Optional, Tuple
+
+import pygame
+
+# Rendered text surfaces kept, the least recently used go first.
+TEXT_CACHE_LIMIT = 1024
+
+Colour = Tuple[int, int, int]
+
+
+class LRUCache:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.entries: collections.OrderedDict = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses = self.misses + 1
+            return None
+        self.hits = self.hits + 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.limit:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+# SysFont looks through every installed font, so each (name, size) is only looked up once.
+_FONTS: Dict[Tuple[Optional[str], int], pygame.font.Font] = dict()
+
+# Keyed by (name, size, text, colour, antialias). Surfaces are shared, never draw onto them.
+_TEXT = LRUCache(TEXT_CACHE_LIMIT)
+
+
+def get_font(size: int, name: str = None) -> pygame.font.Font:
+    key = (name, size)
+    font = _FONTS.get(key)
+    if font is None:
+        font = pygame.font.SysFont(name, size)
+        _FONTS[key] = font
+    return font
+
+
+def render_text(text: str, size: int, colour: Colour, antialias: bool = True, name: str = None) -> pygame.Surface:
+    key = (name, size, text, colour, antialias)
+    surface = _TEXT.get(key)
+    if surface is None:
+        surface = get_font(size, name).render(text, antialias, colour)
+        _TEXT.put(key, surface)
+    return surface
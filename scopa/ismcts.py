@@ -0,0 +1,141 @@
+import math
+import random
+import time
+from typing import Dict, List, Tuple, Callable
+
+from scopa.belief import Belief
+from scopa.cardset import CardSet, EMPTY, indices
+from scopa.endgame import endgame_action, is_endgame
+from scopa.engine import (
+    Action, Event, GameState, calculate_options, current_player, hand, legal_moves, score, step,
+)
+
+EXPLORATION = 0.7
+
+
+def random_policy(rng: random.Random) -> Callable:
+    def policy(state: GameState) -> Action:
+        cards = list(indices(hand(state, current_player(state))))
+        card = rng.choice(cards)
+        options = calculate_options(card, state.centre_cards)
+        return card, rng.choice(options) if options else EMPTY
+    return policy
+
+
+def lower_result(state: GameState) -> float:
+    lower_scores, upper_scores = score(state)
+    lower_points = sum(lower_scores.values())
+    upper_points = sum(upper_scores.values())
+    if lower_points > upper_points:
+        return 1.0
+    elif lower_points < upper_points:
+        return 0.0
+    return 0.5
+
+
+class Node:
+    __slots__ = ("action", "parent", "player", "children", "visits", "availability", "reward")
+
+    def __init__(self, action: Action = None, parent: "Node" = None, player: str = ""):
+        self.action = action
+        self.parent = parent
+        # The player that made the action leading here, rewards are from their point of view.
+        self.player = player
+        self.children: Dict[Action, Node] = dict()
+        self.visits = 0
+        self.availability = 0
+        self.reward = 0.0
+
+    def select(self, actions: List[Action], exploration: float) -> "Node":
+        best = None
+        best_value = -1.0
+        for action in actions:
+            child = self.children[action]
+            child.availability = child.availability + 1
+            value = child.reward / child.visits + exploration * math.sqrt(math.log(child.availability) / child.visits)
+            if value > best_value:
+                best = child
+                best_value = value
+        return best
+
+
+class ISMCTS:
+    # Information set Monte Carlo tree search, called with a state like any other strategy.
+    # Searches for milliseconds, or for a fixed number of iterations if given.
+    # With neither it is anytime, searching until should_stop says so and returning the best move so far.
+    def __init__(self, milliseconds: float = 200, iterations: int = None, exploration: float = EXPLORATION,
+                 rollout: Callable = None, seed: int = None):
+        self.milliseconds = milliseconds
+        self.iterations = iterations
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.rollout = rollout if rollout is not None else random_policy(self.rng)
+        # Where the hidden cards might be, the samples are drawn from it.
+        self.belief = Belief()
+
+    def observe(self, events: List[Event]) -> None:
+        self.belief.observe(events)
+
+    def __call__(self, state: GameState) -> Tuple[int, CardSet]:
+        return self.search(state)
+
+    def search(self, state: GameState, should_stop: Callable = None) -> Tuple[int, CardSet]:
+        if state.game_over or not hand(state, current_player(state)):
+            return None, None
+        actions = legal_moves(state)
+        if len(actions) == 1:
+            return actions[0]
+        # Nothing is hidden once the deck is empty, so there is nothing to sample.
+        if is_endgame(state):
+            return endgame_action(state)
+
+        root = Node()
+        self.belief.follow(state)
+        deadline = time.perf_counter() + self.milliseconds / 1000 if self.milliseconds is not None else None
+        iteration = 0
+        while True:
+            if self.iterations is not None:
+                if iteration >= self.iterations:
+                    break
+            elif deadline is not None and time.perf_counter() >= deadline:
+                break
+            if should_stop is not None and should_stop():
+                break
+            self.iterate(root, self.belief.determinize(state, self.rng))
+            iteration = iteration + 1
+        return best_action(root, actions)
+
+    def iterate(self, root: Node, state: GameState) -> None:
+        node = root
+        untried = list()
+        while not state.game_over:
+            actions = legal_moves(state)
+            untried = [action for action in actions if action not in node.children]
+            if untried:
+                break
+            node = node.select(actions, self.exploration)
+            step(state, node.action)
+
+        if untried:
+            action = self.rng.choice(untried)
+            child = Node(action, node, current_player(state))
+            node.children[action] = child
+            node = child
+            step(state, action)
+
+        while not state.game_over:
+            step(state, self.rollout(state))
+
+        result = lower_result(state)
+        while node is not None:
+            node.visits = node.visits + 1
+            if node.player:
+                node.reward = node.reward + (result if node.player == "lower" else 1.0 - result)
+            node = node.parent
+
+
+def best_action(root: Node, actions: List[Action]) -> Action:
+    if not root.children:
+        return actions[0]
+    best = max(root.children.values(), key=lambda child: child.visits)
+    return best.action
@@ -0,0 +1,80 @@
+from typing import Dict, Tuple
+
+# The board was laid out for this window, other sizes keep the same proportions.
+LOGICAL_WIDTH = 1680
+LOGICAL_HEIGHT = 1050
+
+LOGICAL_CARD_WIDTH = 100
+LOGICAL_CARD_HEIGHT = 160
+
+# Smallest window the board still fits in.
+MIN_WIDTH = 640
+MIN_HEIGHT = 400
+
+
+class Layout:
+    # Positions and sizes for one window size, made again whenever the window changes size.
+    # Positions are fractions of the window, sizes scale with whichever side is tighter so cards keep their shape.
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.scale = min(width / LOGICAL_WIDTH, height / LOGICAL_HEIGHT)
+
+        # Card sizes
+        self.card_width = max(1, round(LOGICAL_CARD_WIDTH * self.scale))
+        self.card_height = max(1, round(LOGICAL_CARD_HEIGHT * self.scale))
+
+        # Hand placements
+        self.lower_hand_height = 5*height/6
+        self.upper_hand_height = height/6
+        self.hand_left_3 = 5*width/12
+        self.hand_right_3 = 7*width/12
+        self.hand_middle = width/2
+        self.centre_hand_height = height/2
+        self.centre_hand_right_margin = width - self.card_width*1.5
+        self.deck_y = height/2
+        self.deck_x = self.card_width*1.1
+        self.upper_won_height = height/3 - self.card_height
+        self.won_width = self.centre_hand_right_margin
+        self.lower_won_height = 2*height/3 + self.card_height
+
+        self.centre_upper_bound = height/3 - self.card_height/2
+        self.centre_lower_bound = 2*height/3 + self.card_height/2
+
+        # Button Constants
+        self.button_width = 3*self.card_width
+        self.button_height = self.card_height/2
+
+        self.placements: Dict[int, float] = {
+            0: self.hand_right_3,
+            1: self.hand_middle,
+            2: self.hand_left_3,
+        }
+
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def card_size(self) -> Tuple[int, int]:
+        return self.card_width, self.card_height
+
+    def font_size(self, size: int) -> int:
+        # Font sizes were picked for the logical window.
+        return max(8, round(size * self.scale))
+
+    def scaled(self, length: float) -> float:
+        # Lengths picked for the logical window, like the results screen's offsets.
+        return length * self.scale
+
+
+def fit_window(width: int, height: int, max_width: int, max_height: int) -> Tuple[int, int]:
+    # The largest window with the same shape that fits within max_width x max_height.
+    if max_width <= 0 or max_height <= 0:
+        return width, height
+    scale = min(1.0, max_width / width, max_height / height)
+    return max(MIN_WIDTH, int(width * scale)), max(MIN_HEIGHT, int(height * scale))
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    # "1280x720" -> (1280, 720)
+    width, _, height = text.partition("x")
+    return int(width), int(height)
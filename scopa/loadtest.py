@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+def parse_address(text: str) -> Tuple[str, int]:
+    # "127.0.0.1:7777" -> ("127.0.0.1", 7777)
+    host, _, port = text.rpartition(":")
+    return host, int(port)
+
+
+async def receive(reader: asyncio.StreamReader) -> Dict:
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("The server closed the connection")
+    message = json.loads(line)
+    if message["type"] == "error":
+        raise RuntimeError(message["message"])
+    return message
+
+
+def send(writer: asyncio.StreamWriter, message: Dict) -> None:
+    writer.write(json.dumps(message).encode() + b"\n")
+
+
+async def play_client(address: Tuple[str, int], games: int, ai: str, think: float, delay: float, rng: random.Random,
+                      latencies: List[float]) -> None:
+    # One simulated player on its own connection, playing random legal moves after think seconds on average.
+    # A move's latency runs from sending it to the table being back on the client's turn, the computer's reply included.
+    await asyncio.sleep(delay)
+    reader, writer = await asyncio.open_connection(*address)
+    try:
+        for _ in range(games):
+            send(writer, {"type": "new", "ai": ai})
+            state = await receive(reader)
+            while not state["game_over"]:
+                if state["turn"] != "lower":
+                    state = await receive(reader)
+                    continue
+                if think:
+                    await asyncio.sleep(rng.uniform(0, 2 * think))
+                move = rng.choice(state["moves"])
+                start = time.perf_counter()
+                send(writer, {"type": "play", "table": state["table"], "card": move["card"], "captures": move["captures"]})
+                state = await receive(reader)
+                while not state["game_over"] and state["turn"] != "lower":
+                    state = await receive(reader)
+                latencies.append(time.perf_counter() - start)
+            send(writer, {"type": "close", "table": state["table"]})
+            await receive(reader)
+    finally:
+        writer.close()
+
+
+async def load(address: Tuple[str, int], clients: int, games: int, ai: str, think: float, ramp: float,
+               seed: int) -> Tuple[List[float], int, float]:
+    latencies: List[float] = list()
+    start = time.perf_counter()
+    # Connections are spread over ramp seconds rather than all arriving at once.
+    results = await asyncio.gather(*[
+        play_client(address, games, ai, think, ramp * index / clients, random.Random(seed * 1000003 + index), latencies)
+        for index in range(clients)
+    ], return_exceptions=True)
+    seconds = time.perf_counter() - start
+    failed = [result for result in results if isinstance(result, Exception)]
+    for error in failed[:5]:
+        print(f"client failed: {error!r}", file=sys.stderr)
+    return latencies, len(failed), seconds
+
+
+def start_server(workers: Optional[int], ai_ms: float) -> Tuple[subprocess.Popen, Tuple[str, int]]:
+    command = [sys.executable, "-m", "scopa.server", "--port", "0", "--ai-ms", str(ai_ms)]
+    if workers is not None:
+        command = command + ["--workers", str(workers)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("listening on "):
+        process.kill()
+        raise RuntimeError(f"The server didn't start: {line!r}")
+    return process, parse_address(line.split()[-1])
+
+
+def stop_server(process: subprocess.Popen) -> float:
+    # The CPU time of the server and its AI workers, counted once they have exited.
+    before = os.times()
+    process.terminate()
+    process.communicate()
+    after = os.times()
+    return after.children_user + after.children_system - before.children_user - before.children_system
+
+
+def summarise(clients: int, games: int, latencies: List[float], failed: int, seconds: float,
+              cpu_seconds: Optional[float]) -> Dict:
+    milliseconds = sorted(latency * 1000 for latency in latencies)
+    cuts = statistics.quantiles(milliseconds, n=100) if len(milliseconds) > 1 else milliseconds * 99
+    summary = {
+        "clients": clients,
+        "failed_clients": failed,
+        "games": clients * games,
+        "moves": len(latencies),
+        "seconds": seconds,
+        "moves_per_second": len(latencies) / seconds,
+        "latency_ms": {"p50": cuts[49], "p99": cuts[98], "max": milliseconds[-1]} if milliseconds else None,
+        "server_cpu_seconds": cpu_seconds,
+        "tables_per_core": None,
+    }
+    if cpu_seconds:
+        # Cores the server kept busy on average, and how many tables one core would take at this pace.
+        summary["server_cores"] = cpu_seconds / seconds
+        summary["tables_per_core"] = clients / summary["server_cores"]
+    return summary
+
+
+def report(summary: Dict) -> str:
+    lines = [f"{summary['clients']} clients, {summary['games']} games, {summary['moves']} client moves in "
+             f"{summary['seconds']:.2f}s ({summary['moves_per_second']:.0f} moves/s)"]
+    if summary["failed_clients"]:
+        lines.append(f"{summary['failed_clients']} clients failed")
+    if summary["latency_ms"] is not None:
+        latency = summary["latency_ms"]
+        lines.append(f"move latency ms: p50 {latency['p50']:.2f}  p99 {latency['p99']:.2f}  max {latency['max']:.2f}")
+    if summary["tables_per_core"] is not None:
+        lines.append(f"server CPU {summary['server_cpu_seconds']:.2f}s, {summary['server_cores']:.2f} cores busy, "
+                     f"{summary['tables_per_core']:.0f} tables per core at this pace")
+    return "\n".join(lines)
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="scopa.loadtest", description="Simulate many players against scopa.server.")
+    parser.add_argument("--clients", type=int, default=100, help="Simulated players, each with their own connection and table.")
+    parser.add_argument("--games", type=int, default=2, help="Games each client plays one after another.")
+    parser.add_argument("--ai", default="greedy", help="The computer player at each table.")
+    parser.add_argument("--think-ms", type=float, default=0, help="Average time a client takes over its move.")
+    parser.add_argument("--ramp", type=float, default=1.0, help="Seconds over which the clients connect.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--connect", type=parse_address, metavar="HOST:PORT",
+                        help="Use a running server. By default one is started here, and its CPU time is measured.")
+    parser.add_argument("--workers", type=int, default=None, help="AI processes for the server started here.")
+    parser.add_argument("--ai-ms", type=float, default=200, help="ismcts thinking time for the server started here.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    process = None
+    if args.connect is not None:
+        address = args.connect
+    else:
+        process, address = start_server(args.workers, args.ai_ms)
+    cpu_seconds = None
+    try:
+        latencies, failed, seconds = asyncio.run(
+            load(address, args.clients, args.games, args.ai, args.think_ms / 1000, args.ramp, args.seed))
+    finally:
+        if process is not None:
+            cpu_seconds = stop_server(process)
+    summary = summarise(args.clients, args.games, latencies, failed, seconds, cpu_seconds)
+    print(json.dumps(summary, indent=2) if args.json else report(summary))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+from scopa.layout import Layout, parse_size
+
+# A pack holds every card image already scaled to one size, as raw RGB rows ready for pygame.image.frombuffer.
+# Layout: header, JSON index, then the pixels of each image one after another from DATA_ALIGN.
+MAGIC = b"SCOPAPK1"
+HEADER = struct.Struct("<8sHHHI")
+DATA_ALIGN = 4096
+PIXEL_FORMAT = "RGB"
+BYTES_PER_PIXEL = 3
+
+fileloc = os.path.dirname(__file__)
+
+PACK_DIR = os.path.join(fileloc, "resources")
+
+Key = Tuple[str, str]
+
+
+def pack_path(size: Tuple[int, int]) -> str:
+    width, height = size
+    return os.path.join(PACK_DIR, f"cards_{width}x{height}.pack")
+
+
+def fingerprint(path: str) -> List[int]:
+    # Size and whole second mtime, cheap enough to check at every start.
+    stat = os.stat(path)
+    return [stat.st_size, int(stat.st_mtime)]
+
+
+def build_pack(images: Dict[Key, str], size: Tuple[int, int], path: str = None) -> str:
+    # Scales the same way as loading the JPEG directly, so both give the same pixels.
+    path = path if path is not None else pack_path(size)
+    width, height = size
+    keys = sorted(images)
+    index = {
+        "format": PIXEL_FORMAT,
+        "cards": [list(key) for key in keys],
+        "sources": {f"{suit}/{value}": [os.path.relpath(images[suit, value], fileloc)] + fingerprint(images[suit, value])
+                    for suit, value in keys},
+    }
+    index_bytes = json.dumps(index).encode()
+    data_start = -(-(HEADER.size + len(index_bytes)) // DATA_ALIGN) * DATA_ALIGN
+
+    # Written next to the pack and renamed over it, a half written pack is never loaded.
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(HEADER.pack(MAGIC, width, height, len(keys), len(index_bytes)))
+        file.write(index_bytes)
+        file.write(b"\0" * (data_start - HEADER.size - len(index_bytes)))
+        for key in keys:
+            image = pygame.transform.scale(pygame.image.load(images[key]), size)
+            file.write(pygame.image.tostring(image, PIXEL_FORMAT))
+    os.replace(temporary, path)
+    return path
+
+
+def read_index(data) -> Tuple[Tuple[int, int], Dict, int]:
+    magic, width, height, cards, index_length = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a card pack")
+    index = json.loads(bytes(data[HEADER.size:HEADER.size + index_length]))
+    if len(index["cards"]) != cards or index["format"] != PIXEL_FORMAT:
+        raise ValueError("Corrupt card pack")
+    data_start = -(-(HEADER.size + index_length) // DATA_ALIGN) * DATA_ALIGN
+    return (width, height), index, data_start
+
+
+def is_stale(index: Dict, images: Dict[Key, str]) -> bool:
+    sources = index["sources"]
+    if len(sources) != len(images):
+        return True
+    for (suit, value), path in images.items():
+        source = sources.get(f"{suit}/{value}")
+        if source is None or not os.path.exists(path) or source[1:] != fingerprint(path):
+            return True
+    return False
+
+
+def load_pack(images: Dict[Key, str], size: Tuple[int, int], path: str = None) -> Optional[Dict[Key, pygame.Surface]]:
+    # Display format surfaces for every image, or None if the pack is missing, stale or broken.
+    # Needs a display mode to be set, the same as Surface.convert.
+    path = path if path is not None else pack_path(size)
+    try:
+        file = open(path, "rb")
+    except OSError:
+        return None
+    with file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        with data:
+            return read_pack(data, images, size)
+
+
+def read_pack(data: mmap.mmap, images: Dict[Key, str], size: Tuple[int, int]) -> Optional[Dict[Key, pygame.Surface]]:
+    try:
+        pack_size, index, data_start = read_index(data)
+    except (ValueError, KeyError, struct.error):
+        return None
+    if tuple(pack_size) != tuple(size) or is_stale(index, images):
+        return None
+    image_bytes = size[0] * size[1] * BYTES_PER_PIXEL
+    if len(data) < data_start + image_bytes * len(index["cards"]):
+        return None
+
+    textures = dict()
+    view = memoryview(data)
+    try:
+        for i, (suit, value) in enumerate(index["cards"]):
+            start = data_start + i * image_bytes
+            # frombuffer doesn't copy, convert makes the copy that outlives the mapping.
+            raw = pygame.image.frombuffer(view[start:start + image_bytes], size, PIXEL_FORMAT)
+            textures[suit, value] = raw.convert()
+            del raw
+    finally:
+        view.release()
+    return textures
+
+
+def main(argv: List[str] = None) -> None:
+    from scopa.engine import START_DECK_VALUES
+    from scopa.textures import card_images
+
+    parser = argparse.ArgumentParser(prog="scopa.pack", description="Prebake the card images for fast startup.")
+    parser.add_argument("--size", type=parse_size, action="append", metavar="WIDTHxHEIGHT",
+                        help="Card size to bake, can be given more than once.")
+    parser.add_argument("--window", type=parse_size, action="append", metavar="WIDTHxHEIGHT",
+                        help="Bake the cards for a window of this size, as given to the game's --size. Can be given more "
+                             "than once. By default the cards are baked for the window the game opens on this desktop.")
+    args = parser.parse_args(argv)
+    sizes = [(size, None) for size in args.size or list()]
+    windows = args.window or list()
+    if not sizes and not windows:
+        # Imported here, the game only has to be loaded to work out its window.
+        from scopa import __main__ as game
+        pygame.display.init()
+        windows = [game.window_size(game.parse_args([]))]
+    sizes = sizes + [(Layout(*window).card_size(), window) for window in windows]
+    images = card_images(START_DECK_VALUES)
+    for size, window in sizes:
+        path = build_pack(images, size)
+        fits = f", the cards for a {window[0]}x{window[1]} window" if window is not None else ""
+        print(f"Wrote {len(images)} images at {size[0]}x{size[1]}{fits} to {path}")
+
+if __name__ == "__main__":
+    main()
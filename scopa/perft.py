@@ -0,0 +1,104 @@
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from scopa.engine import Action, GameState, legal_moves, new_game, seeded_deck, step
+from scopa.protocol import format_move
+
+# Counts every sequence of moves from a seeded deal, as chess engines do to check their move generators.
+# Dealing follows from the seed, so each count is fixed: a change to the rules or to legal_moves that changes
+# a count has changed which moves are legal.
+
+# Known counts for depths 1, 2, ... from the deal of each seed.
+KNOWN: Dict[int, List[int]] = {
+    0: [3, 9, 18, 39, 41, 43, 134, 414, 835, 1690, 1709, 1777, 5335, 16863, 34053, 69371],
+    1: [3, 9, 18, 36, 36, 36, 108, 324, 684, 1368, 2016, 2016, 9180, 28044, 74412, 149904],
+    2: [4, 12, 30, 60, 72, 72, 216, 674, 1348, 2858, 2858, 3022, 9066, 27428, 56476, 117694],
+}
+
+
+def perft(state: GameState, depth: int) -> int:
+    # Positions reached after exactly depth moves. A game that ends sooner counts nothing.
+    if depth == 0:
+        return 1
+    moves = legal_moves(state)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        child = state.copy()
+        step(child, move)
+        nodes = nodes + perft(child, depth - 1)
+    return nodes
+
+
+def divide(state: GameState, depth: int) -> List[Tuple[Action, int]]:
+    # The count under each first move, to narrow down where two move generators disagree.
+    counts = list()
+    for move in legal_moves(state):
+        child = state.copy()
+        step(child, move)
+        counts.append((move, perft(child, depth - 1)))
+    return counts
+
+
+def run(seed: int, depth: int) -> List[Dict]:
+    results = list()
+    for current in range(1, depth + 1):
+        state, _ = new_game(seeded_deck(seed))
+        start = time.perf_counter()
+        nodes = perft(state, current)
+        seconds = time.perf_counter() - start
+        results.append({"depth": current, "nodes": nodes, "seconds": seconds, "nodes_per_second": nodes / seconds})
+    return results
+
+
+def mismatches(seed: int, results: List[Dict]) -> List[str]:
+    known = KNOWN.get(seed, list())
+    return [
+        f"depth {result['depth']}: {result['nodes']} nodes, expected {known[result['depth'] - 1]}"
+        for result in results
+        if result["depth"] <= len(known) and result["nodes"] != known[result["depth"] - 1]
+    ]
+
+
+def report(seed: int, results: List[Dict]) -> str:
+    known = KNOWN.get(seed, list())
+    lines = [f"seed {seed}", f"{'depth':>5}{'nodes':>14}{'seconds':>10}{'nodes/s':>12}  known"]
+    for result in results:
+        depth = result["depth"]
+        check = ("ok" if known[depth - 1] == result["nodes"] else "WRONG") if depth <= len(known) else "-"
+        lines.append(f"{depth:>5}{result['nodes']:>14}{result['seconds']:>10.3f}{result['nodes_per_second']:>12.0f}  {check}")
+    return "\n".join(lines)
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="scopa.perft", description="Count move sequences from a seeded deal.")
+    parser.add_argument("--seed", type=int, default=0, help="Deals the same cards as --seed in the game.")
+    parser.add_argument("--depth", type=int, default=12, help="Counts every depth from 1 up to this one.")
+    parser.add_argument("--divide", action="store_true", help="Show the count under each first move at --depth.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    if args.divide:
+        state, _ = new_game(seeded_deck(args.seed))
+        counts = divide(state, args.depth)
+        for move, nodes in counts:
+            print(f"{format_move(move)}: {nodes}")
+        print(f"total: {sum(nodes for _, nodes in counts)}")
+        return 0
+    results = run(args.seed, args.depth)
+    print(json.dumps(results, indent=2) if args.json else report(args.seed, results))
+    wrong = mismatches(args.seed, results)
+    for line in wrong:
+        print(line, file=sys.stderr)
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import collections
+import cProfile
+import csv
+import pstats
+import time
+from typing import Dict, List, Optional
+
+import pygame
+
+from scopa.fonts import get_font
+
+PHASES = ("events", "logic", "ai", "draw", "present", "wait")
+
+# Frames kept for the overlay's averages and percentiles.
+WINDOW = 240
+
+# The overlay text is rendered at most this often, in seconds.
+OVERLAY_INTERVAL = 0.25
+
+OVERLAY_BACKGROUND = (0, 0, 0, 170)
+OVERLAY_TEXT = (255, 255, 255)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    # Nearest rank, values must be sorted.
+    if not values:
+        return 0.0
+    rank = min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[rank]
+
+
+class Overlay(pygame.sprite.DirtySprite):
+    def __init__(self, position=(10, 10)):
+        super().__init__()
+        # The text changes every time, so only the font is shared.
+        self.font = get_font(22)
+        self.position = position
+        self.image = pygame.Surface((1, 1), pygame.SRCALPHA)
+        self.rect = self.image.get_rect(topleft=position)
+
+    def set_lines(self, lines: List[str]) -> None:
+        surfaces = [self.font.render(line, True, OVERLAY_TEXT) for line in lines]
+        width = max(surface.get_width() for surface in surfaces) + 12
+        height = sum(surface.get_height() for surface in surfaces) + 12
+        image = pygame.Surface((width, height), pygame.SRCALPHA)
+        image.fill(OVERLAY_BACKGROUND)
+        y = 6
+        for surface in surfaces:
+            image.blit(surface, (6, y))
+            y = y + surface.get_height()
+        self.image = image
+        self.rect = image.get_rect(topleft=self.position)
+        self.dirty = 1
+
+
+class FrameProfiler:
+    # Splits each frame of the game loop into phases with mark(), call begin() at the top of the frame and end() at the bottom.
+    # Time between two marks goes to the phase named by the second one.
+    # wait is time spent blocked on input or holding the frame rate, work is everything else.
+    def __init__(self, out_path: str = None):
+        self.out_path = out_path
+        self.file = None
+        self.writer = None
+        if out_path is not None:
+            self.file = open(out_path, "w", newline="")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(["frame", "time", "frame_ms", "work_ms"] + [f"{phase}_ms" for phase in PHASES])
+
+        self.start = time.perf_counter()
+        self.frame = 0
+        self.frame_start = self.start
+        self.last = self.start
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+
+        # Recent frames as (frame_ms, work_ms, phases).
+        self.history = collections.deque(maxlen=WINDOW)
+
+        self.overlay: Optional[Overlay] = None
+        self.overlay_time = 0.0
+        self.show_overlay = False
+
+        self.cprofile: Optional[cProfile.Profile] = None
+
+    def begin(self) -> None:
+        now = time.perf_counter()
+        self.frame_start = now
+        self.last = now
+        for phase in PHASES:
+            self.phases[phase] = 0.0
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases[phase] = self.phases[phase] + now - self.last
+        self.last = now
+
+    def end(self) -> None:
+        now = time.perf_counter()
+        frame_ms = (now - self.frame_start) * 1000
+        phases = {phase: seconds * 1000 for phase, seconds in self.phases.items()}
+        work_ms = frame_ms - phases["wait"]
+        self.history.append((frame_ms, work_ms, phases))
+        if self.writer is not None:
+            self.writer.writerow(
+                [self.frame, f"{now - self.start:.6f}", f"{frame_ms:.3f}", f"{work_ms:.3f}"]
+                + [f"{phases[phase]:.3f}" for phase in PHASES]
+            )
+        self.frame = self.frame + 1
+        if self.show_overlay and now - self.overlay_time >= OVERLAY_INTERVAL:
+            self.overlay_time = now
+            self.overlay.set_lines(self.summary())
+
+    def summary(self) -> List[str]:
+        frames = len(self.history)
+        if frames == 0:
+            return ["No frames yet"]
+        total_ms = sum(frame_ms for frame_ms, _, _ in self.history)
+        work = sorted(work_ms for _, work_ms, _ in self.history)
+        lines = [
+            f"FPS {frames * 1000 / total_ms if total_ms > 0 else 0.0:.1f}",
+            f"work ms p50 {percentile(work, 0.5):.2f}  p95 {percentile(work, 0.95):.2f}  "
+            f"p99 {percentile(work, 0.99):.2f}  max {work[-1]:.2f}",
+        ]
+        for phase in PHASES:
+            times = sorted(phases[phase] for _, _, phases in self.history)
+            lines.append(f"{phase:<8} mean {sum(times) / frames:.2f}  p95 {percentile(times, 0.95):.2f}  max {times[-1]:.2f}")
+        lines.append("F3 hide, F4 " + ("stop cProfile (recording)" if self.cprofile is not None else "start cProfile"))
+        return lines
+
+    def toggle_overlay(self) -> None:
+        if self.overlay is None:
+            self.overlay = Overlay()
+        self.show_overlay = not self.show_overlay
+        if self.show_overlay:
+            self.overlay_time = time.perf_counter()
+            self.overlay.set_lines(self.summary())
+
+    def toggle_cprofile(self) -> None:
+        # Only sees the game loop's thread, the computer's thinking on the worker thread isn't included.
+        if self.cprofile is None:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+            print("cProfile started, press F4 again to stop")
+            return
+        self.cprofile.disable()
+        path = time.strftime("scopa-%Y%m%d-%H%M%S.prof")
+        self.cprofile.dump_stats(path)
+        print(f"cProfile written to {path}")
+        pstats.Stats(self.cprofile).sort_stats("cumulative").print_stats(25)
+        self.cprofile = None
+
+    def handle_event(self, event: pygame.event.Event) -> bool:
+        # True if the event was a profiler hotkey.
+        if event.type != pygame.KEYDOWN:
+            return False
+        if event.key == pygame.K_F3:
+            self.toggle_overlay()
+            return True
+        if event.key == pygame.K_F4:
+            self.toggle_cprofile()
+            return True
+        return False
+
+    def close(self) -> None:
+        if self.cprofile is not None:
+            self.toggle_cprofile()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.writer = None
@@ -0,0 +1,317 @@
+import atexit
+import collections
+import queue
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from scopa.ai import decide_option
+from scopa.cardset import ALL_CARDS, CardSet, EMPTY, count, from_indices, indices
+from scopa.engine import Action, GameState, current_player, hand, legal_moves, opponent, won_cards
+from scopa.tally import Tally
+
+# A line based protocol for computer players running as their own process, in the spirit of UCI.
+# The host writes commands to the engine's stdin and reads replies from its stdout, one per line.
+#
+#   host                              engine
+#   scopa                             id name <name> (optional), then scopaok
+#   isready                           readyok
+#   newgame                           (nothing, the host follows it with isready)
+#   position <field>=<value> ...      (nothing)
+#   go movetime <ms>                  bestmove <move> within ms
+#   go infinite                       bestmove <move> once told to stop, or sooner
+#   stop                              bestmove <move> straight away if still thinking
+#   quit                              exits
+#
+# Cards are their index, suit * 10 + value - 1 with the suits Coins, Clubs, Cups and Swords, so the 7 of Coins is 6.
+# Sets of cards are indices joined with "+", or "-" when empty. A move is the card played, then ":" and the
+# cards it captures if it captures any, e.g. "16" or "16:3+12".
+# Position fields: player (lower or upper, whoever is to move), hand, centre, lowerwon, upperwon, lowerscope,
+# upperscope, opponent (how many cards are in the other hand), deck (how many are left), lastcapture
+# (lower or upper, who takes what is left in the centre at the end) and moves (the legal moves, joined with ",").
+# Lines the host doesn't know, like "info ...", are ignored. An engine should exit when its stdin closes.
+
+# Seconds an engine gets to start up and answer scopa, or to answer isready.
+HANDSHAKE_TIMEOUT = 10.0
+# Seconds on top of movetime for the bestmove to arrive, and to answer stop, before the engine counts as hung.
+MOVE_GRACE = 0.1
+STOP_TIMEOUT = 0.5
+# Seconds between checks of should_stop while waiting for a reply.
+POLL_INTERVAL = 0.01
+
+
+def format_cards(cards: CardSet) -> str:
+    return "+".join(str(index) for index in indices(cards)) or "-"
+
+
+def parse_cards(text: str) -> CardSet:
+    if text == "-":
+        return EMPTY
+    return from_indices(int(index) for index in text.split("+"))
+
+
+def format_move(action: Action) -> str:
+    card, option = action
+    return f"{card}:{format_cards(option)}" if option else str(card)
+
+
+def parse_move(text: str) -> Action:
+    card, _, option = text.partition(":")
+    return int(card), parse_cards(option) if option else EMPTY
+
+
+def format_position(state: GameState) -> str:
+    # Only what the player to move can see or work out, the other hand and the deck are just counted.
+    player = current_player(state)
+    fields = [
+        ("player", player),
+        ("hand", format_cards(hand(state, player))),
+        ("centre", format_cards(state.centre_cards)),
+        ("lowerwon", format_cards(state.lower_won_cards)),
+        ("upperwon", format_cards(state.upper_won_cards)),
+        ("lowerscope", state.lower_tally.scope),
+        ("upperscope", state.upper_tally.scope),
+        ("opponent", count(hand(state, opponent(player)))),
+        ("deck", len(state.deck)),
+        ("lastcapture", "lower" if state.player_last_won else "upper"),
+        ("moves", ",".join(format_move(action) for action in legal_moves(state))),
+    ]
+    return "position " + " ".join(f"{name}={value}" for name, value in fields)
+
+
+def parse_position(line: str) -> GameState:
+    # A state for the player to move. The cards they can't see are split between the other hand and the deck
+    # in no particular order, which is exact once the deck is empty.
+    fields = dict(field.partition("=")[::2] for field in line.split()[1:])
+    player = fields["player"]
+    state = GameState.__new__(GameState)
+    state.first_deal = False
+    state.game_over = False
+    state.player_1_turn = player == "lower"
+    state.player_last_won = fields["lastcapture"] == "lower"
+    state.centre_cards = parse_cards(fields["centre"])
+    state.lower_won_cards = parse_cards(fields["lowerwon"])
+    state.upper_won_cards = parse_cards(fields["upperwon"])
+    own = parse_cards(fields["hand"])
+    unseen = list(indices(ALL_CARDS & ~(own | state.centre_cards | state.lower_won_cards | state.upper_won_cards)))
+    other = from_indices(unseen[:int(fields["opponent"])])
+    state.deck = unseen[int(fields["opponent"]):]
+    state.lower_cards, state.upper_cards = (own, other) if player == "lower" else (other, own)
+    state.lower_tally = Tally()
+    state.upper_tally = Tally()
+    for side, tally in (("lower", state.lower_tally), ("upper", state.upper_tally)):
+        won = won_cards(state, side)
+        tally.add(won, won)
+        tally.scope = int(fields[side + "scope"])
+    return state
+
+
+class EngineProcess:
+    # One running engine. Replies are read on a thread of their own, so the host can wait for them with a timeout.
+    def __init__(self, command: List[str]):
+        self.command = command
+        self.name = command[0]
+        self.process: Optional[subprocess.Popen] = None
+        self.lines: queue.Queue = queue.Queue()
+        # Set once its stdout closes, which can be before the process has finished exiting.
+        self.exited = False
+        self.start()
+
+    def start(self) -> None:
+        # Each start gets a new queue, nothing from an engine that was killed can be read as a reply.
+        self.lines = queue.Queue()
+        self.exited = False
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, bufsize=1)
+        threading.Thread(target=self.read, args=(self.process.stdout, self.lines), name="scopa-engine-reader",
+                         daemon=True).start()
+        self.send("scopa")
+        reply = self.wait_for("scopaok", HANDSHAKE_TIMEOUT)
+        if reply is None:
+            self.kill()
+            raise RuntimeError(f"{' '.join(self.command)} didn't answer scopa")
+
+    @staticmethod
+    def read(stdout, lines: queue.Queue) -> None:
+        for line in stdout:
+            lines.put(line.strip())
+        # The engine has exited or closed its stdout.
+        lines.put(None)
+
+    def alive(self) -> bool:
+        return self.process is not None and not self.exited and self.process.poll() is None
+
+    def send(self, line: str) -> bool:
+        try:
+            self.process.stdin.write(line + "\n")
+            self.process.stdin.flush()
+            return True
+        except (BrokenPipeError, OSError, ValueError):
+            return False
+
+    def wait_for(self, command: str, timeout: float, should_stop: Callable[[], bool] = None) -> Optional[str]:
+        # The first reply that starts with command, or None if the engine exits, timeout passes or should_stop says so.
+        deadline = time.perf_counter() + timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if self.exited or remaining <= 0 or (should_stop is not None and should_stop()):
+                return None
+            try:
+                line = self.lines.get(timeout=min(remaining, POLL_INTERVAL))
+            except queue.Empty:
+                continue
+            if line is None:
+                self.exited = True
+                return None
+            words = line.split()
+            if not words:
+                continue
+            if words[0] == "id" and words[1:2] == ["name"]:
+                self.name = " ".join(words[2:]) or self.name
+            if words[0] == command:
+                return line
+
+    def ready(self) -> bool:
+        return self.send("isready") and self.wait_for("readyok", HANDSHAKE_TIMEOUT) is not None
+
+    def kill(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+    def close(self) -> None:
+        if self.alive():
+            self.send("quit")
+            try:
+                self.process.wait(STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                pass
+        self.kill()
+
+
+class EnginePool:
+    # Engines kept running between games, so each game doesn't pay for starting one.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.idle: Dict[Tuple[str, ...], List[EngineProcess]] = collections.defaultdict(list)
+
+    def acquire(self, command: List[str]) -> EngineProcess:
+        while True:
+            with self.lock:
+                idle = self.idle[tuple(command)]
+                engine = idle.pop() if idle else None
+            if engine is None:
+                return EngineProcess(command)
+            if engine.alive() and engine.send("newgame") and engine.ready():
+                return engine
+            engine.kill()
+
+    def release(self, engine: EngineProcess) -> None:
+        if not engine.alive():
+            return
+        with self.lock:
+            self.idle[tuple(engine.command)].append(engine)
+
+    def close(self) -> None:
+        with self.lock:
+            engines = [engine for idle in self.idle.values() for engine in idle]
+            self.idle.clear()
+        for engine in engines:
+            engine.close()
+
+
+POOL = EnginePool()
+atexit.register(POOL.close)
+
+
+class EngineStrategy:
+    # A strategy played by an external engine, see the protocol above.
+    # Thinks for milliseconds per move, or with none is anytime and searches until should_stop says so, like ISMCTS.
+    # The host enforces the time limit: past it the engine is told to stop, and if it still doesn't answer it is killed.
+    # A killed or crashed engine is started again for the next move. Whenever the engine has no legal move to give,
+    # the built-in decide_option plays instead. failures counts each of these, and moves that came late.
+    def __init__(self, command: List[str], milliseconds: float = 200, pool: EnginePool = POOL,
+                 fallback: Callable = decide_option):
+        self.command = command
+        self.milliseconds = milliseconds
+        self.pool = pool
+        self.fallback = fallback
+        self.engine: Optional[EngineProcess] = None
+        self.failures: Dict[str, int] = collections.Counter()
+
+    def __call__(self, state: GameState) -> Action:
+        return self.search(state)
+
+    def search(self, state: GameState, should_stop: Callable[[], bool] = None) -> Action:
+        actions = legal_moves(state)
+        if not actions:
+            return None, None
+        if len(actions) == 1:
+            return actions[0]
+
+        if self.engine is not None and not self.engine.alive():
+            # Exited since its last move.
+            self.fail("crash")
+        if self.engine is None:
+            try:
+                self.engine = self.pool.acquire(self.command)
+            except (OSError, RuntimeError) as error:
+                print(f"{' '.join(self.command)}: {error}", file=sys.stderr)
+                self.failures["start"] = self.failures["start"] + 1
+                return self.fallback(state)
+        engine = self.engine
+
+        engine.send(format_position(state))
+        if self.milliseconds is not None:
+            engine.send(f"go movetime {int(self.milliseconds)}")
+            reply = engine.wait_for("bestmove", self.milliseconds / 1000 + MOVE_GRACE, should_stop)
+        else:
+            engine.send("go infinite")
+            reply = engine.wait_for("bestmove", float("inf"), should_stop)
+        if reply is None and engine.alive():
+            engine.send("stop")
+            reply = engine.wait_for("bestmove", STOP_TIMEOUT)
+            if reply is not None and self.milliseconds is not None:
+                # Still played, but over its time.
+                self.failures["late"] = self.failures["late"] + 1
+        if reply is None:
+            self.fail("timeout" if engine.alive() else "crash")
+            return self.fallback(state)
+
+        try:
+            action = parse_move(reply.split()[1])
+        except (IndexError, ValueError):
+            action = None
+        if action not in actions:
+            print(f"{engine.name}: illegal move {reply!r}", file=sys.stderr)
+            self.failures["illegal"] = self.failures["illegal"] + 1
+            return self.fallback(state)
+        return action
+
+    def fail(self, reason: str) -> None:
+        # The engine is killed and a new one started for the next move.
+        print(f"{self.engine.name}: {reason}, restarting it", file=sys.stderr)
+        self.failures[reason] = self.failures[reason] + 1
+        self.engine.kill()
+        self.engine = None
+
+    def close(self) -> None:
+        # Back to the pool for the next game.
+        if self.engine is not None:
+            self.pool.release(self.engine)
+            self.engine = None
+
+
+def engine_strategy(text: str) -> EngineStrategy:
+    # "ms=100 python -m scopa.bot greedy", settings come first as name=value words, then the command.
+    words = shlex.split(text)
+    settings = dict()
+    while words and "=" in words[0] and not words[0].startswith("-"):
+        name, _, value = words.pop(0).partition("=")
+        settings[name] = float(value)
+    if not words:
+        raise ValueError(f"No engine command in {text!r}")
+    return EngineStrategy(words, milliseconds=settings.get("ms", 200))
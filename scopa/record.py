@@ -0,0 +1,162 @@
+import argparse
+import struct
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from scopa.cardset import DECK_SIZE, EMPTY, card_tuple
+from scopa.engine import CATEGORIES, Action, GameState, new_game, score, step
+
+# A record is everything needed to play a game again: its seed, the shuffled deck and every action in order.
+# Records are written one after another, so one file can hold a whole corpus of games.
+# Layout: header, the two player names, the deck, the actions, then the scores if the game was finished.
+MAGIC = b"SCOPARC2"
+# magic, seed, lower name length, upper name length, number of actions
+HEADER = struct.Struct("<8sQHHB")
+# Records from before names could be longer than 255 bytes, still read.
+MAGIC_V1 = b"SCOPARC1"
+HEADER_V1 = struct.Struct("<8sQBBB")
+HEADERS = {MAGIC: HEADER, MAGIC_V1: HEADER_V1}
+# card index, captured cards as a 40 bit CardSet
+ACTION = struct.Struct("<B5s")
+# finished, then the points in each category for lower and then upper
+SCORES = struct.Struct(f"<?{2 * len(CATEGORIES)}B")
+
+Scores = Tuple[Dict[str, int], Dict[str, int]]
+
+# Seeds are stored unsigned in 64 bits.
+MAX_SEED = (1 << 64) - 1
+
+# Longest player name in bytes, with its length in 16 bits.
+MAX_NAME = (1 << 16) - 1
+
+
+class TruncatedRecord(ValueError):
+    # The data ends before the record does, as when a crash cut off the last one written.
+    pass
+
+
+def check_seed(seed: int) -> None:
+    if not 0 <= seed <= MAX_SEED:
+        raise ValueError(f"Seeds have to be from 0 to {MAX_SEED} to be recorded, not {seed}")
+
+
+def fit_name(name: str) -> str:
+    # Names are strategy specs, only an engine command could be this long. Cut short rather than lose the record.
+    return name.encode()[:MAX_NAME].decode(errors="ignore")
+
+
+def parse_seed(text: str) -> int:
+    # For --seed, caught before any game is played rather than when it's written.
+    seed = int(text)
+    try:
+        check_seed(seed)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+    return seed
+
+
+class GameRecord:
+    def __init__(self, seed: int, deck: List[int], players: Tuple[str, str] = ("lower", "upper")):
+        self.seed = seed
+        # Card indices as in GameState.deck before the first deal, dealt from the end.
+        self.deck = list(deck)
+        self.players = (fit_name(players[0]), fit_name(players[1]))
+        self.actions: List[Action] = list()
+        # What score() gave when the game finished, None if it was never finished.
+        self.scores: Optional[Scores] = None
+
+    def add(self, action: Action) -> None:
+        card, option = action
+        self.actions.append((card, option or EMPTY))
+
+    def finish(self, state: GameState) -> None:
+        if state.game_over:
+            self.scores = score(state)
+
+    def deck_values(self) -> List[Tuple[str, int]]:
+        return [(suit, value) for value, suit in map(card_tuple, self.deck)]
+
+
+def encode(record: GameRecord) -> bytes:
+    lower, upper = (name.encode() for name in record.players)
+    parts = [HEADER.pack(MAGIC, record.seed, len(lower), len(upper), len(record.actions)), lower, upper, bytes(record.deck)]
+    parts.extend(ACTION.pack(card, option.to_bytes(5, "little")) for card, option in record.actions)
+    if record.scores is None:
+        parts.append(SCORES.pack(False, *[0] * 2 * len(CATEGORIES)))
+    else:
+        lower_scores, upper_scores = record.scores
+        parts.append(SCORES.pack(True, *[lower_scores[name] for name in CATEGORIES], *[upper_scores[name] for name in CATEGORIES]))
+    return b"".join(parts)
+
+
+def decode(data: bytes, offset: int = 0) -> Tuple[GameRecord, int]:
+    # The record starting at offset, and the offset of the one after it.
+    header = HEADERS.get(bytes(data[offset:offset + len(MAGIC)]))
+    if header is None:
+        if len(data) - offset < len(MAGIC):
+            raise TruncatedRecord("Truncated game record")
+        raise ValueError("Not a game record")
+    try:
+        _, seed, lower_length, upper_length, actions = header.unpack_from(data, offset)
+    except struct.error:
+        raise TruncatedRecord("Truncated game record")
+    offset = offset + header.size
+    if offset + lower_length + upper_length + DECK_SIZE + actions * ACTION.size + SCORES.size > len(data):
+        raise TruncatedRecord("Truncated game record")
+    lower = bytes(data[offset:offset + lower_length]).decode()
+    offset = offset + lower_length
+    upper = bytes(data[offset:offset + upper_length]).decode()
+    offset = offset + upper_length
+    deck = list(data[offset:offset + DECK_SIZE])
+    offset = offset + DECK_SIZE
+    if sorted(deck) != list(range(DECK_SIZE)):
+        raise ValueError("Corrupt game record")
+    record = GameRecord(seed, deck, (lower, upper))
+    for _ in range(actions):
+        card, option = ACTION.unpack_from(data, offset)
+        record.actions.append((card, int.from_bytes(option, "little")))
+        offset = offset + ACTION.size
+    finished, *points = SCORES.unpack_from(data, offset)
+    offset = offset + SCORES.size
+    if finished:
+        record.scores = (dict(zip(CATEGORIES, points)), dict(zip(CATEGORIES, points[len(CATEGORIES):])))
+    return record, offset
+
+
+def write_record(path: str, record: GameRecord) -> None:
+    # Appended in one write, so a crash can at worst cut off the last record.
+    with open(path, "ab") as file:
+        file.write(encode(record))
+
+
+def read_records(path: str) -> Iterator[GameRecord]:
+    with open(path, "rb") as file:
+        data = file.read()
+    offset = 0
+    records = 0
+    while offset < len(data):
+        try:
+            record, offset = decode(data, offset)
+        except TruncatedRecord:
+            # Only the last record can be cut off, the ones before it are whole.
+            print(f"{path}: the last record is cut off, skipping it after {records} whole ones", file=sys.stderr)
+            return
+        records = records + 1
+        yield record
+
+
+def check(record: GameRecord) -> Optional[str]:
+    # Plays the record again with the current rules, and says why it doesn't go the same way any more, None if it does.
+    state, _ = new_game(record.deck_values())
+    for number, action in enumerate(record.actions):
+        try:
+            step(state, action)
+        except ValueError as error:
+            return f"action {number}: {error}"
+    if record.scores is None:
+        return None
+    if not state.game_over:
+        return "the game was finished but isn't over after replaying it"
+    if score(state) != record.scores:
+        return f"scored {score(state)} but recorded {record.scores}"
+    return None
@@ -0,0 +1,64 @@
+from typing import List, Tuple
+
+import pygame
+
+# Layers, higher is drawn on top.
+PILE_LAYER = 0
+HAND_LAYER = 1
+MOVING_LAYER = 2
+DRAGGING_LAYER = 3
+BUTTON_LAYER = 4
+OVERLAY_LAYER = 5
+
+
+class Renderer:
+    def __init__(self, screen: pygame.Surface, background: pygame.Surface):
+        self.screen = screen
+        self.background = background
+        self.group = pygame.sprite.LayeredDirty()
+        self.group.clear(screen, background)
+        self.repaint = True
+
+    def resize(self, screen: pygame.Surface, background: pygame.Surface) -> None:
+        self.screen = screen
+        self.background = background
+        self.group.clear(screen, background)
+        self.repaint = True
+
+    def sync(self, visible: List[Tuple[pygame.sprite.DirtySprite, int]]) -> None:
+        # Keeps the group to exactly the sprites given, removed sprites get cleared by the group.
+        wanted = dict(visible)
+        for sprite in self.group.sprites():
+            if sprite not in wanted:
+                self.group.remove(sprite)
+        for sprite, layer in visible:
+            if sprite not in self.group:
+                sprite.dirty = 1
+                self.group.add(sprite, layer=layer)
+            elif self.group.get_layer_of_sprite(sprite) != layer:
+                sprite.dirty = 1
+                self.group.change_layer(sprite, layer)
+
+    def changed(self) -> bool:
+        return self.repaint or bool(self.group.lostsprites) or any(sprite.dirty for sprite in self.group)
+
+    def draw(self, visible: List[Tuple[pygame.sprite.DirtySprite, int]], present: bool = True) -> List[pygame.Rect]:
+        self.sync(visible)
+        if not self.changed():
+            # Nothing moved, nothing to draw or present.
+            return list()
+        if self.repaint:
+            self.screen.blit(self.background, (0, 0))
+            for sprite in self.group:
+                sprite.dirty = 1
+        rects = self.group.draw(self.screen)
+        # The group only resets these when it draws in dirty rect mode, not when it draws everything.
+        for sprite in self.group:
+            if sprite.dirty == 1:
+                sprite.dirty = 0
+        if self.repaint:
+            rects = [self.screen.get_rect()]
+            self.repaint = False
+        if present:
+            pygame.display.update(rects)
+        return rects
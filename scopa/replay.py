@@ -0,0 +1,162 @@
+import argparse
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from scopa.cardset import EMPTY
+from scopa.engine import new_game, step
+from scopa.layout import parse_size
+from scopa.record import GameRecord, check, read_records
+from scopa.strategies import make_strategy
+
+
+def compare_ai(record: GameRecord, spec: str) -> Tuple[int, int]:
+    # Asks the strategy again at every position the record has it playing, as (moves, moves it would now play differently).
+    # Only meaningful for strategies that always pick the same move, like greedy.
+    strategy = make_strategy(spec, seed=record.seed)
+    state, _ = new_game(record.deck_values())
+    moves = 0
+    changed = 0
+    for action in record.actions:
+        if record.players[0 if state.player_1_turn else 1] == spec:
+            moves = moves + 1
+            card, option = strategy(state.copy())
+            if (card, option or EMPTY) != action:
+                changed = changed + 1
+        step(state, action)
+    return moves, changed
+
+
+def replay_all(records: List[GameRecord], ai: str = None) -> Dict:
+    start = time.perf_counter()
+    problems = list()
+    moves = 0
+    changed = 0
+    changed_games = 0
+    for number, record in enumerate(records):
+        problem = check(record)
+        if problem is not None:
+            problems.append(f"game {number} (seed {record.seed}): {problem}")
+            continue
+        if ai is not None:
+            game_moves, game_changed = compare_ai(record, ai)
+            moves = moves + game_moves
+            changed = changed + game_changed
+            changed_games = changed_games + (game_changed > 0)
+    seconds = time.perf_counter() - start
+    return {
+        "games": len(records),
+        "actions": sum(len(record.actions) for record in records),
+        "seconds": seconds,
+        "problems": problems,
+        "ai": ai,
+        "ai_moves": moves,
+        "ai_changed": changed,
+        "ai_changed_games": changed_games,
+    }
+
+
+def report(summary: Dict) -> str:
+    games_per_second = summary["games"] / summary["seconds"] if summary["seconds"] > 0 else float("inf")
+    lines = [f"replayed {summary['games']} games, {summary['actions']} actions in {summary['seconds']:.2f}s "
+             f"({games_per_second:.0f} games/s)"]
+    if summary["problems"]:
+        lines.append(f"{len(summary['problems'])} games no longer replay the same way:")
+        lines.extend("  " + problem for problem in summary["problems"])
+    else:
+        lines.append("every game replays the same way")
+    if summary["ai"] is not None:
+        lines.append(f"{summary['ai']} would now play {summary['ai_changed']} of its {summary['ai_moves']} moves differently, "
+                     f"in {summary['ai_changed_games']} games")
+    return "\n".join(lines)
+
+
+def watch(records: List[GameRecord], speed: float, size: Tuple[int, int] = None) -> None:
+    # Only watching needs a window, so pygame and the front end are imported here.
+    import pygame
+
+    import scopa.__main__ as game
+
+    pygame.init()
+    game._build()
+    screen = game.get_board(size if size is not None else game.window_size(game.parse_args([])))
+    controller = game.Controller(screen, speed=speed)
+    for number, record in enumerate(records):
+        pygame.display.set_caption(f"Scopa - replay {number + 1}/{len(records)}, seed {record.seed}, "
+                                   f"{record.players[0]} vs {record.players[1]}")
+        controller = game.restart(controller, record.seed, record.deck_values())
+        actions = list(record.actions)
+        while not controller.quit and (actions or controller.events or controller.tweener.busy()):
+            if controller.tweener.busy():
+                controller.tweener.update()
+            elif controller.events:
+                controller = game.animate_event(controller)
+            else:
+                try:
+                    controller = game.play_card(controller, *actions.pop(0))
+                except ValueError as error:
+                    print(f"game {number} (seed {record.seed}) stopped: {error}")
+                    actions = list()
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    controller.quit = True
+                else:
+                    game.window_event(controller, event)
+            if controller.resize_to is not None:
+                controller = game.resize(controller, controller.resize_to)
+                controller.resize_to = None
+            game.draw_controller(controller)
+            controller.clock.tick(game.FPS)
+        if controller.quit:
+            break
+        # The results screen, its Restart button goes on to the next game.
+        controller.game_running = False
+        controller = game.win_logic(controller)
+        if controller.quit:
+            break
+    controller.worker.close()
+    pygame.quit()
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="scopa.replay", description="Play recorded games again.")
+    parser.add_argument("path", help="Record file written with --record.")
+    parser.add_argument("--game", type=int, action="append", metavar="N",
+                        help="Only replay game N, counting from 0. Can be given more than once.")
+    parser.add_argument("--ai", metavar="SPEC",
+                        help="Also ask this strategy for its move wherever the record has it playing, e.g. greedy.")
+    parser.add_argument("--watch", action="store_true", help="Show the games in a window instead of checking them.")
+    parser.add_argument("--speed", type=float, default=1.0, help="Animation speed when watching.")
+    parser.add_argument("--size", type=parse_size, metavar="WIDTHxHEIGHT", help="Window size when watching.")
+    args = parser.parse_args(argv)
+    if args.ai is not None:
+        try:
+            make_strategy(args.ai)
+        except ValueError as error:
+            parser.error(str(error))
+    # The records are read here, so a missing file or a game that isn't in it stops before anything is replayed.
+    try:
+        args.records = list(read_records(args.path))
+    except (OSError, ValueError) as error:
+        parser.error(f"{args.path}: {error}")
+    for number in args.game or list():
+        if not 0 <= number < len(args.records):
+            parser.error(f"--game {number}: {args.path} holds {len(args.records)} games, counted from 0")
+    return args
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    records = args.records
+    if args.game is not None:
+        records = [records[number] for number in args.game]
+    if args.watch:
+        watch(records, args.speed, args.size)
+        return 0
+    summary = replay_all(records, args.ai)
+    print(report(summary))
+    return 1 if summary["problems"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+import argparse
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import os
+import signal
+import time
+from typing import Callable, Dict, List, Optional
+
+from scopa.cardset import count, from_indices, indices
+from scopa.engine import (
+    Action, Event, GameState, current_player, find_winner, hand, legal_moves, new_game, new_seed, seeded_deck, step,
+)
+from scopa.strategies import make_strategy
+
+# Many tables in one process. Clients speak JSON, one object per line, over TCP.
+#
+#   client                                            server
+#   {"type": "new", "ai": "greedy", "seed": 42}       {"type": "state", "table": 1, ...}
+#   {"type": "play", "table": 1, "card": 16,          {"type": "state", ...} after the play,
+#    "captures": [3, 12]}                             and again after each computer play
+#   {"type": "close", "table": 1}                     {"type": "closed", "table": 1}
+#   {"type": "stats"}                                 {"type": "stats", "tables": ..., "moves": ...}
+#
+# Anything wrong gets {"type": "error", "message": ...}, with the table if there is one. seed is optional.
+# Clients sit in the lower seat and play first, the computer has the upper seat.
+# A state has the client's view: "turn", "hand", "centre", "lower_won", "upper_won", "scope", "opponent" (cards in
+# the other hand), "deck" (cards left), "moves" (legal plays as card and captures, on the client's turn),
+# "events" (what just happened, in order, other hand's cards are null) and "game_over", then "scores" and "winner".
+# Cards are their 0-39 index, as in scopa.protocol.
+
+AI_NAMES = ("greedy", "random", "ismcts")
+
+# Per connection, and for the whole server.
+MAX_TABLES_PER_CLIENT = 16
+MAX_TABLES = 10000
+
+# Longest line a client may send, in bytes.
+LINE_LIMIT = 4096
+
+# Connections waiting to be accepted, for when many players arrive at once.
+BACKLOG = 1024
+
+CLIENT_SEAT = "lower"
+
+# Made once per worker process, so each spec only sets up once.
+_STRATEGIES: Dict[str, Callable] = dict()
+
+
+def ai_move(spec: str, state: GameState) -> Action:
+    # Runs in the process pool.
+    strategy = _STRATEGIES.get(spec)
+    if strategy is None:
+        strategy = make_strategy(spec)
+        _STRATEGIES[spec] = strategy
+    return strategy(state)
+
+
+def event_json(event: Event) -> Dict:
+    kind, cards, placement = event
+    if kind == "deal" and placement not in (CLIENT_SEAT, "centre"):
+        # Dealt to the other hand, face down.
+        cards = [None] * len(cards)
+    return {"kind": kind, "cards": cards, "to": placement}
+
+
+def state_json(table: "Table", events: List[Event]) -> Dict:
+    state = table.state
+    other = "upper" if CLIENT_SEAT == "lower" else "lower"
+    message = {
+        "type": "state",
+        "table": table.id,
+        "seed": table.seed,
+        "turn": current_player(state),
+        "hand": list(indices(hand(state, CLIENT_SEAT))),
+        "centre": list(indices(state.centre_cards)),
+        "lower_won": list(indices(state.lower_won_cards)),
+        "upper_won": list(indices(state.upper_won_cards)),
+        "scope": {"lower": state.lower_tally.scope, "upper": state.upper_tally.scope},
+        "opponent": count(hand(state, other)),
+        "deck": len(state.deck),
+        "moves": [],
+        "events": [event_json(event) for event in events],
+        "game_over": state.game_over,
+    }
+    if state.game_over:
+        winner, lower_scores, upper_scores = find_winner(state)
+        message["scores"] = {"lower": lower_scores, "upper": upper_scores}
+        message["winner"] = {"You": "lower", "Computer": "upper"}.get(winner, "draw")
+    elif current_player(state) == CLIENT_SEAT:
+        message["moves"] = [{"card": card, "captures": list(indices(option))} for card, option in legal_moves(state)]
+    return message
+
+
+class Table:
+    def __init__(self, table_id: int, ai: str, seed: int):
+        self.id = table_id
+        self.ai = ai
+        self.seed = seed
+        self.state, self.deal = new_game(seeded_deck(seed))
+        # One message at a time, a play waits for the computer's reply to the last one.
+        self.lock = asyncio.Lock()
+
+
+class Server:
+    def __init__(self, workers: Optional[int] = None, ai_ms: float = 200):
+        # With no workers the computer plays on the event loop, quicker than a round trip for a cheap strategy.
+        self.pool = concurrent.futures.ProcessPoolExecutor(workers) if workers != 0 else None
+        self.ai_ms = ai_ms
+        self.ids = itertools.count(1)
+        self.tables: Dict[int, Table] = dict()
+        self.moves = 0
+        self.games = 0
+        self.start = time.perf_counter()
+
+    def spec(self, name: str) -> str:
+        # Clients pick a name, the server picks the settings.
+        return f"ismcts:ms={self.ai_ms}" if name == "ismcts" else name
+
+    async def computer_turns(self, table: Table, send: Callable[[Dict], None]) -> None:
+        loop = asyncio.get_running_loop()
+        while not table.state.game_over and current_player(table.state) != CLIENT_SEAT:
+            spec = self.spec(table.ai)
+            if self.pool is None:
+                action = ai_move(spec, table.state)
+            else:
+                action = await loop.run_in_executor(self.pool, ai_move, spec, table.state)
+            events = step(table.state, action)
+            self.moves = self.moves + 1
+            send(state_json(table, events))
+        if table.state.game_over:
+            self.games = self.games + 1
+
+    async def handle(self, message: Dict, tables: Dict[int, Table], send: Callable[[Dict], None]) -> None:
+        kind = message.get("type")
+        if kind == "new":
+            ai = message.get("ai", "greedy")
+            if ai not in AI_NAMES:
+                raise ValueError(f"Unknown ai {ai!r}, expected one of {', '.join(AI_NAMES)}")
+            if len(tables) >= MAX_TABLES_PER_CLIENT or len(self.tables) >= MAX_TABLES:
+                raise ValueError("Too many tables")
+            seed = message.get("seed")
+            table = Table(next(self.ids), ai, int(seed) if seed is not None else new_seed())
+            tables[table.id] = table
+            self.tables[table.id] = table
+            send(state_json(table, table.deal))
+        elif kind == "play":
+            table = tables.get(message.get("table"))
+            if table is None:
+                raise ValueError("No such table")
+            async with table.lock:
+                if table.state.game_over or current_player(table.state) != CLIENT_SEAT:
+                    raise ValueError("Not your turn")
+                action = (int(message["card"]), from_indices(int(card) for card in message.get("captures", ())))
+                # Same checks as the game, the card has to be held and has to capture if it can.
+                events = step(table.state, action)
+                self.moves = self.moves + 1
+                send(state_json(table, events))
+                await self.computer_turns(table, send)
+        elif kind == "close":
+            table = tables.pop(message.get("table"), None)
+            if table is None:
+                raise ValueError("No such table")
+            del self.tables[table.id]
+            send({"type": "closed", "table": table.id})
+        elif kind == "stats":
+            send(self.stats())
+        else:
+            raise ValueError(f"Unknown message type {kind!r}")
+
+    def stats(self) -> Dict:
+        return {"type": "stats", "tables": len(self.tables), "games": self.games, "moves": self.moves,
+                "seconds": time.perf_counter() - self.start}
+
+    async def client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        tables: Dict[int, Table] = dict()
+        tasks = set()
+
+        def send(message: Dict) -> None:
+            if not writer.is_closing():
+                writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+        async def run(message: Dict) -> None:
+            try:
+                await self.handle(message, tables, send)
+            except (KeyError, TypeError, ValueError) as error:
+                send({"type": "error", "table": message.get("table"), "message": str(error)})
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    # Over LINE_LIMIT, or gone.
+                    break
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError("Expected an object")
+                except ValueError as error:
+                    send({"type": "error", "message": str(error)})
+                    continue
+                # Tables play at the same time, each table's own lock keeps its messages in order.
+                task = asyncio.ensure_future(run(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            for task in tasks:
+                task.cancel()
+            for table_id in tables:
+                self.tables.pop(table_id, None)
+            writer.close()
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+async def serve(host: str, port: int, workers: Optional[int], ai_ms: float) -> None:
+    server = Server(workers, ai_ms)
+    listener = await asyncio.start_server(server.client, host, port, limit=LINE_LIMIT, backlog=BACKLOG)
+    address = listener.sockets[0].getsockname()
+    # Read by scopa.loadtest to find the port when it is picked by the system.
+    print(f"listening on {address[0]}:{address[1]}", flush=True)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Not on Windows, Ctrl+C still ends it with KeyboardInterrupt.
+            pass
+    try:
+        async with listener:
+            await stop.wait()
+    finally:
+        server.close()
+        print(json.dumps(server.stats()), flush=True)
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="scopa.server", description="Host many tables against the computer over TCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777, help="0 picks a free port.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes for the computer's moves, one per core by default. 0 plays them on the event loop.")
+    parser.add_argument("--ai-ms", type=float, default=200, help="Thinking time per move for ismcts tables.")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> None:
+    args = parse_args(argv)
+    asyncio.run(serve(args.host, args.port, args.workers if args.workers is not None else os.cpu_count(), args.ai_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import random
+from typing import Callable, Dict
+
+from scopa.ai import SWEEP_PENALTY, Wary, decide_option
+from scopa.ismcts import EXPLORATION, ISMCTS, random_policy
+from scopa.protocol import engine_strategy
+
+STRATEGY_NAMES = ("greedy", "wary", "random", "ismcts", "engine")
+
+
+def parse_options(text: str) -> Dict[str, float]:
+    # "ms=50,iterations=200" -> {"ms": 50.0, "iterations": 200.0}
+    options = dict()
+    for part in filter(None, text.split(",")):
+        name, _, value = part.partition("=")
+        options[name.strip()] = float(value)
+    return options
+
+
+def make_strategy(spec: str, seed: int = None) -> Callable:
+    # Specs are a name with optional settings, e.g. "greedy", "random" or "ismcts:iterations=300".
+    # An external engine's settings are its command, e.g. "engine:ms=100 ./my-bot", see scopa.protocol.
+    name, _, settings = spec.partition(":")
+    if name == "engine":
+        return engine_strategy(settings)
+    options = parse_options(settings)
+    if name == "greedy":
+        return decide_option
+    if name == "wary":
+        return Wary(penalty=options.get("penalty", SWEEP_PENALTY))
+    if name == "random":
+        return random_policy(random.Random(seed))
+    if name == "ismcts":
+        iterations = options.get("iterations")
+        return ISMCTS(
+            milliseconds=options.get("ms", 200),
+            iterations=int(iterations) if iterations is not None else None,
+            exploration=options.get("exploration", EXPLORATION),
+            seed=seed,
+        )
+    raise ValueError(f"Unknown strategy {spec!r}, expected one of {', '.join(STRATEGY_NAMES)}")
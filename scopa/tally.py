@@ -0,0 +1,49 @@
+from scopa.cardset import CardSet, COINS, SEVENS, SIXES, SETTEBELLO, NAPOLA, count
+
+
+class Tally:
+    # Running counts for one player's won pile, kept up to date as cards are captured.
+    __slots__ = ("cards", "coins", "sevens", "sixes", "settebello", "napola_cards", "napola", "scope")
+
+    def __init__(self):
+        self.cards = 0
+        self.coins = 0
+        self.sevens = 0
+        self.sixes = 0
+        self.settebello = False
+        # How many of the 1, 2 and 3 of Coins are held, and the run of Coins from the 1 upwards.
+        self.napola_cards = 0
+        self.napola = 0
+        self.scope = 0
+
+    def copy(self) -> "Tally":
+        tally = Tally.__new__(Tally)
+        tally.cards = self.cards
+        tally.coins = self.coins
+        tally.sevens = self.sevens
+        tally.sixes = self.sixes
+        tally.settebello = self.settebello
+        tally.napola_cards = self.napola_cards
+        tally.napola = self.napola
+        tally.scope = self.scope
+        return tally
+
+    def add(self, captured: CardSet, won: CardSet) -> None:
+        # won is the whole pile after the capture.
+        self.cards = self.cards + count(captured)
+        coins = captured & COINS
+        if coins:
+            self.coins = self.coins + count(coins)
+            self.napola_cards = self.napola_cards + count(coins & NAPOLA)
+            # The lowest Coin not yet won ends the run.
+            missing = ~won & COINS
+            self.napola = (missing & -missing).bit_length() - 1 if missing else 10
+            self.settebello = self.settebello or bool(captured & SETTEBELLO)
+        self.sevens = self.sevens + count(captured & SEVENS)
+        self.sixes = self.sixes + count(captured & SIXES)
+
+    def napola_points(self) -> int:
+        # Only a run of at least three counts. A full run of all ten scores nothing, as score() always has.
+        if 3 <= self.napola < 10:
+            return self.napola
+        return 0
@@ -0,0 +1,120 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+from scopa.pack import load_pack
+
+fileloc = os.path.dirname(__file__)
+
+IMAGE_PATH = os.path.join(fileloc, "resources/images/")
+BACK_IMAGE_PATH = os.path.join(fileloc, "resources/images/Dummy/Dummy_Dummy.jpg")
+
+Key = Tuple[str, str, Tuple[int, int]]
+
+# Decoded and scaled card images, shared by every Card in the process.
+# Keyed by (suit, value, (width, height)) so each image is only loaded once per size.
+_TEXTURES: Dict[Key, pygame.Surface] = dict()
+
+# Background loading, see preload_textures. Images wait in _QUEUED until a thread claims them.
+# The claiming thread holds the image in _LOADING until it has decoded it into _LOADED.
+# Only the main thread converts them to the display format and moves them to _TEXTURES.
+_LOCK = threading.Lock()
+_QUEUED: List[Key] = list()
+_LOADING: Dict[Key, threading.Event] = dict()
+_LOADED: Dict[Key, pygame.Surface] = dict()
+
+
+def image_path(suit, value) -> str:
+    if suit == "Dummy":
+        return BACK_IMAGE_PATH
+    return os.path.join(IMAGE_PATH, f"{suit}/{value}_{suit}.jpg")
+
+
+def load_image(suit, value, size: Tuple[int, int]) -> pygame.Surface:
+    return pygame.transform.scale(pygame.image.load(image_path(suit, value)), size)
+
+
+def get_texture(suit, value, size: Tuple[int, int]) -> pygame.Surface:
+    key = (str(suit), str(value), size)
+    texture = _TEXTURES.get(key)
+    if texture is None:
+        with _LOCK:
+            loading = _LOADING.get(key)
+            if loading is None and key in _QUEUED:
+                # Not started in the background yet, quicker to load it here than to wait for its turn.
+                _QUEUED.remove(key)
+        if loading is not None:
+            loading.wait()
+        image = _LOADED.pop(key, None)
+        if image is None:
+            image = load_image(suit, value, size)
+        texture = image.convert()
+        _TEXTURES[key] = texture
+    return texture
+
+
+def get_back_texture(size: Tuple[int, int]) -> pygame.Surface:
+    return get_texture("Dummy", "Dummy", size)
+
+
+def drop_textures(keep: Tuple[int, int]) -> None:
+    # Forgets every size but keep. Cards still showing an old texture hold on to it until they are resized.
+    with _LOCK:
+        _QUEUED[:] = [key for key in _QUEUED if key[2] == keep]
+        for key in [key for key in _LOADED if key[2] != keep]:
+            del _LOADED[key]
+    for key in [key for key in _TEXTURES if key[2] != keep]:
+        del _TEXTURES[key]
+
+
+def card_images(cards) -> Dict[Tuple[str, str], str]:
+    # Every image a game needs, the back first as it is the first one drawn, then the card faces.
+    images = {("Dummy", "Dummy"): BACK_IMAGE_PATH}
+    images.update({(str(suit), str(value)): image_path(suit, value) for suit, value in cards})
+    return images
+
+
+def load_queued() -> None:
+    while True:
+        with _LOCK:
+            if not _QUEUED:
+                return
+            key = _QUEUED.pop(0)
+            loading = threading.Event()
+            _LOADING[key] = loading
+        try:
+            suit, value, size = key
+            _LOADED[key] = load_image(suit, value, size)
+        finally:
+            # Anyone waiting loads it themselves if this failed.
+            with _LOCK:
+                del _LOADING[key]
+            loading.set()
+
+
+def preload_textures(cards, size: Tuple[int, int], background: bool = False) -> Optional[threading.Thread]:
+    # The prebaked pack for this size if there is an up to date one, see scopa.pack, otherwise the JPEGs.
+    # The pack is quick enough to load here, JPEGs can be left to a background thread.
+    images = card_images(cards)
+    if any((suit, value, size) not in _TEXTURES for suit, value in images):
+        packed = load_pack(images, size)
+        if packed is not None:
+            for (suit, value), texture in packed.items():
+                _TEXTURES.setdefault((suit, value, size), texture)
+    if not background:
+        for suit, value in images:
+            get_texture(suit, value, size)
+        return None
+
+    with _LOCK:
+        for suit, value in images:
+            key = (suit, value, size)
+            if key not in _TEXTURES and key not in _LOADED and key not in _LOADING and key not in _QUEUED:
+                _QUEUED.append(key)
+        if not _QUEUED:
+            return None
+    thread = threading.Thread(target=load_queued, name="scopa-textures", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,170 @@
+import argparse
+import collections
+import hashlib
+import json
+import math
+import multiprocessing
+import time
+from typing import Dict, List, Tuple
+
+from scopa.engine import CATEGORIES, deck_indices, play_game, score, seeded_deck
+from scopa.record import GameRecord, check_seed, encode, parse_seed
+from scopa.strategies import make_strategy
+
+# Two sided 95% normal interval.
+Z_95 = 1.96
+
+
+def deck_seed(seed: int, pair: int) -> int:
+    return seed * 1000003 + pair
+
+
+def strategy_seed(seed: int, index: int, side: str) -> int:
+    # A stream of its own for each strategy in each game, apart from every deck seed and from each other.
+    digest = hashlib.sha256(f"strategy:{seed}:{index}:{side}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def check_seeds(seed: int, games: int) -> None:
+    # Every deck seed has to fit in a record, the first and last pairs' are the smallest and biggest.
+    check_seed(deck_seed(seed, 0))
+    check_seed(deck_seed(seed, max(games - 1, 0) // 2))
+
+
+def game_deck(seed: int, pair: int) -> List[Tuple[str, int]]:
+    return seeded_deck(deck_seed(seed, pair))
+
+
+def play_one(job: Tuple[int, int, str, str, bool]) -> Dict:
+    # Games come in pairs on the same deck with the seats swapped, which evens out the luck of the deal.
+    # "a" is the first strategy in the tournament, whichever seat it has.
+    index, seed, spec_a, spec_b, recording = job
+    deck = game_deck(seed, index // 2)
+    a_lower = index % 2 == 0
+    strategy_a = make_strategy(spec_a, seed=strategy_seed(seed, index, "a"))
+    strategy_b = make_strategy(spec_b, seed=strategy_seed(seed, index, "b"))
+    players = (spec_a, spec_b) if a_lower else (spec_b, spec_a)
+    record = GameRecord(deck_seed(seed, index // 2), deck_indices(deck), players)
+    if a_lower:
+        state = play_game(strategy_a, strategy_b, deck, record.actions)
+    else:
+        state = play_game(strategy_b, strategy_a, deck, record.actions)
+    for strategy in (strategy_a, strategy_b):
+        # External engines go back to their pool, warm for the next game.
+        if hasattr(strategy, "close"):
+            strategy.close()
+    lower_scores, upper_scores = score(state)
+    a_scores, b_scores = (lower_scores, upper_scores) if a_lower else (upper_scores, lower_scores)
+    a_points = sum(a_scores.values())
+    b_points = sum(b_scores.values())
+    if a_points > b_points:
+        result = 1.0
+    elif a_points < b_points:
+        result = 0.0
+    else:
+        result = 0.5
+    game = {"index": index, "result": result, "a": a_scores, "b": b_scores,
+            "a_failures": dict(getattr(strategy_a, "failures", {})), "b_failures": dict(getattr(strategy_b, "failures", {}))}
+    if recording:
+        record.finish(state)
+        game["record"] = encode(record)
+    return game
+
+
+def summarise(games: List[Dict], spec_a: str, spec_b: str, seconds: float) -> Dict:
+    n = len(games)
+    results = [game["result"] for game in games]
+    mean = sum(results) / n
+    variance = sum((result - mean) ** 2 for result in results) / (n - 1) if n > 1 else 0.0
+    margin = Z_95 * math.sqrt(variance / n)
+    return {
+        "a": spec_a,
+        "b": spec_b,
+        "games": n,
+        "a_wins": results.count(1.0),
+        "b_wins": results.count(0.0),
+        "draws": results.count(0.5),
+        "a_score": mean,
+        "a_score_95": [max(0.0, mean - margin), min(1.0, mean + margin)],
+        "a_points": {name: sum(game["a"][name] for game in games) / n for name in CATEGORIES},
+        "b_points": {name: sum(game["b"][name] for game in games) / n for name in CATEGORIES},
+        # Moves an external engine didn't play itself, by why.
+        "a_failures": sum((collections.Counter(game["a_failures"]) for game in games), collections.Counter()),
+        "b_failures": sum((collections.Counter(game["b_failures"]) for game in games), collections.Counter()),
+        "seconds": seconds,
+        "games_per_second": n / seconds if seconds > 0 else float("inf"),
+    }
+
+
+def run(spec_a: str, spec_b: str, games: int, seed: int = 0, processes: int = None, record_path: str = None) -> Dict:
+    if record_path is not None:
+        # Before playing, not once every game is over.
+        check_seeds(seed, games)
+    jobs = [(index, seed, spec_a, spec_b, record_path is not None) for index in range(games)]
+    start = time.perf_counter()
+    if processes == 1:
+        results = [play_one(job) for job in jobs]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            chunksize = max(1, games // ((processes or multiprocessing.cpu_count()) * 8))
+            results = list(pool.imap_unordered(play_one, jobs, chunksize))
+    seconds = time.perf_counter() - start
+    results.sort(key=lambda game: game["index"])
+    if record_path is not None:
+        with open(record_path, "ab") as file:
+            for game in results:
+                file.write(game.pop("record"))
+    return summarise(results, spec_a, spec_b, seconds)
+
+
+def report(summary: Dict) -> str:
+    low, high = summary["a_score_95"]
+    lines = [
+        f"{summary['a']} vs {summary['b']}: {summary['games']} games in {summary['seconds']:.2f}s "
+        f"({summary['games_per_second']:.1f} games/s)",
+        f"{summary['a']} won {summary['a_wins']}, lost {summary['b_wins']}, drew {summary['draws']}",
+        f"{summary['a']} score {summary['a_score']:.3f} (95% CI {low:.3f} - {high:.3f})",
+        f"{'points per game':<16}{summary['a']:>20}{summary['b']:>20}",
+    ]
+    for name in CATEGORIES:
+        lines.append(f"{name:<16}{summary['a_points'][name]:>20.3f}{summary['b_points'][name]:>20.3f}")
+    for side in ("a", "b"):
+        if summary[side + "_failures"]:
+            failures = ", ".join(f"{count} {reason}" for reason, count in sorted(summary[side + "_failures"].items()))
+            lines.append(f"{summary[side]} engine failures: {failures}")
+    return "\n".join(lines)
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="scopa.tournament", description="Play seeded self-play games between two strategies.")
+    parser.add_argument("-a", default="greedy", help="First strategy, e.g. greedy, random or ismcts:iterations=300.")
+    parser.add_argument("-b", default="random", help="Second strategy.")
+    parser.add_argument("-n", "--games", type=int, default=1000, help="Number of games, played in pairs with seats swapped.")
+    parser.add_argument("--seed", type=parse_seed, default=0)
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes, all cores by default.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    parser.add_argument("--record", metavar="PATH", help="Append every game to a record file, see python -m scopa.replay.")
+    args = parser.parse_args(argv)
+    if args.games < 1:
+        parser.error("-n has to be at least 1")
+    try:
+        check_seeds(args.seed, args.games)
+    except ValueError as error:
+        parser.error(str(error))
+    # Check the specs here rather than in every worker.
+    for spec in (args.a, args.b):
+        try:
+            make_strategy(spec)
+        except ValueError as error:
+            parser.error(str(error))
+    return args
+
+
+def main(argv: List[str] = None) -> None:
+    args = parse_args(argv)
+    summary = run(args.a, args.b, args.games, args.seed, args.processes, args.record)
+    print(json.dumps(summary, indent=2) if args.json else report(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import time
+from typing import List, Tuple, Callable
+
+import pygame
+
+
+class Tween:
+    # Moves a sprite's centre in a straight line over duration seconds, after waiting delay seconds.
+    def __init__(self, sprite: pygame.sprite.Sprite, end: Tuple[float, float], duration: float,
+                 delay: float = 0.0, on_finish: Callable = None):
+        self.sprite = sprite
+        self.start = sprite.rect.center
+        self.end = end
+        self.duration = duration
+        self.elapsed = -delay
+        self.on_finish = on_finish
+
+    def update(self, dt: float) -> bool:
+        self.elapsed = self.elapsed + dt
+        if self.elapsed < 0:
+            return False
+        # Positions come from the time passed, so a late frame jumps ahead instead of slowing down.
+        progress = min(self.elapsed / self.duration, 1.0) if self.duration > 0 else 1.0
+        startx, starty = self.start
+        endx, endy = self.end
+        self.sprite.set_position(startx + (endx - startx) * progress, starty + (endy - starty) * progress)
+        return progress >= 1.0
+
+    def finish(self) -> None:
+        self.sprite.set_position(*self.end)
+        if self.on_finish is not None:
+            self.on_finish()
+
+
+class Tweener:
+    def __init__(self, speed: float = 1.0):
+        # 1 is normal speed, 2 twice as fast, 0 finishes every tween as soon as it is added.
+        self.speed = speed
+        self.tweens: List[Tween] = list()
+        self.last = time.perf_counter()
+
+    def busy(self) -> bool:
+        return bool(self.tweens)
+
+    def add(self, sprite: pygame.sprite.Sprite, end: Tuple[float, float], duration: float,
+            delay: float = 0.0, on_finish: Callable = None) -> Tween:
+        tween = Tween(sprite, end, duration, delay, on_finish)
+        if self.speed <= 0:
+            tween.finish()
+            return tween
+        if not self.tweens:
+            # Don't count the time spent idle before this tween started.
+            self.last = time.perf_counter()
+        self.tweens.append(tween)
+        return tween
+
+    def update(self) -> None:
+        now = time.perf_counter()
+        dt = (now - self.last) * self.speed
+        self.last = now
+        running = list()
+        finished = list()
+        for tween in self.tweens:
+            if tween.update(dt):
+                finished.append(tween)
+            else:
+                running.append(tween)
+        self.tweens = running
+        for tween in finished:
+            tween.finish()
+
+    def sprites(self) -> List[pygame.sprite.Sprite]:
+        return [tween.sprite for tween in self.tweens]
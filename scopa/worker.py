@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+import traceback
+from typing import Callable, List, Optional
+
+from scopa.ai import decide_option
+from scopa.engine import Action, Event, GameState
+
+
+# Queued by end_game.
+END_GAME = "end game"
+
+
+class AIWorker:
+    # Runs a strategy on its own thread so the frame loop keeps going while the computer thinks.
+    # Strategies with a search(state, should_stop) method are anytime, they return their best move so far when stopped.
+    def __init__(self, strategy: Callable):
+        self.strategy = strategy
+        self.requests: queue.Queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.ticket = 0
+        self.stop = threading.Event()
+        self.action: Optional[Action] = None
+        # Pending from a request until its result is taken, ready once the result is in.
+        self.pending = False
+        self.ready = False
+        self.thread = threading.Thread(target=self.run, name="scopa-ai", daemon=True)
+        self.thread.start()
+
+    def request(self, state: GameState, milliseconds: float = None) -> None:
+        # Thinks about a copy, the game can carry on changing its own state.
+        self.cancel()
+        with self.lock:
+            self.ticket = self.ticket + 1
+            self.stop = threading.Event()
+            deadline = time.perf_counter() + milliseconds / 1000 if milliseconds is not None else None
+            self.action = None
+            self.pending = True
+            self.ready = False
+            self.requests.put((self.ticket, state.copy(), self.stop, deadline))
+
+    def observe(self, events: List[Event]) -> None:
+        # For strategies that follow the game, see Belief. Queued, so they see events in order with the requests.
+        if hasattr(self.strategy, "observe"):
+            self.requests.put(list(events))
+
+    def end_game(self) -> None:
+        # Strategies holding on to something for a game, like an external engine, let go of it between games.
+        # Queued, so it happens on this thread once any search in progress has stopped.
+        if hasattr(self.strategy, "close"):
+            self.requests.put(END_GAME)
+
+    def result(self) -> Optional[Action]:
+        # The chosen action once it's ready, otherwise None.
+        with self.lock:
+            if not self.ready:
+                return None
+            action = self.action
+            self.action = None
+            self.pending = False
+            self.ready = False
+            return action
+
+    def cancel(self) -> None:
+        with self.lock:
+            self.ticket = self.ticket + 1
+            self.stop.set()
+            self.action = None
+            self.pending = False
+            self.ready = False
+
+    def close(self) -> None:
+        self.cancel()
+        self.requests.put(None)
+        self.thread.join()
+        # Strategies holding on to something, like an external engine, let go of it with the worker.
+        if hasattr(self.strategy, "close"):
+            self.strategy.close()
+
+    def run(self) -> None:
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            if request == END_GAME:
+                try:
+                    self.strategy.close()
+                except Exception:
+                    traceback.print_exc()
+                continue
+            if isinstance(request, list):
+                try:
+                    self.strategy.observe(request)
+                except Exception:
+                    # Its next move still gets asked for, a strategy that missed events catches up from the state.
+                    traceback.print_exc()
+                continue
+            ticket, state, stop, deadline = request
+            if stop.is_set():
+                continue
+
+            def should_stop() -> bool:
+                return stop.is_set() or (deadline is not None and time.perf_counter() >= deadline)
+
+            # The strategy gets a copy of its own, so the fallback below sees the position as it was.
+            try:
+                if hasattr(self.strategy, "search"):
+                    action = self.strategy.search(state.copy(), should_stop)
+                else:
+                    action = self.strategy(state.copy())
+            except Exception:
+                # The game would otherwise wait forever for this move, the greedy player makes it instead.
+                traceback.print_exc()
+                action = decide_option(state)
+            with self.lock:
+                # A cancelled or replaced request has a stale ticket, its answer is dropped.
+                if ticket == self.ticket:
+                    self.action = action
+                    self.ready = True
@@ -0,0 +1,84 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from scopa.batch import from_states, score_batch, unpack
+from scopa.cardset import ALL_CARDS, COINS, SEVENS, CardSet, card_index, from_indices
+from scopa.engine import CATEGORIES, GameState, play_game, score, seeded_deck
+from scopa.strategies import make_strategy
+from scopa.tally import Tally
+
+Scores = Tuple[Dict[str, int], Dict[str, int]]
+
+
+def played_games(games: int) -> List[GameState]:
+    states = list()
+    for seed in range(games):
+        lower, upper = make_strategy("greedy"), make_strategy("random", seed=seed)
+        if seed % 2:
+            lower, upper = upper, lower
+        states.append(play_game(lower, upper, seeded_deck(seed)))
+    return states
+
+
+def finished(lower_won: CardSet, lower_scope: int = 0, upper_scope: int = 0) -> GameState:
+    # A finished game with the won piles built by hand, every card not in lower_won going to upper.
+    state = GameState(seeded_deck(0))
+    state.deck = list()
+    state.lower_won_cards = lower_won
+    state.upper_won_cards = ALL_CARDS & ~lower_won
+    state.lower_tally = Tally()
+    state.lower_tally.add(state.lower_won_cards, state.lower_won_cards)
+    state.lower_tally.scope = lower_scope
+    state.upper_tally = Tally()
+    state.upper_tally.add(state.upper_won_cards, state.upper_won_cards)
+    state.upper_tally.scope = upper_scope
+    state.game_over = True
+    return state
+
+
+def game_scores(batch: Scores, game: int) -> Scores:
+    lower_points, upper_points = batch
+    return ({name: int(lower_points[name][game]) for name in CATEGORIES},
+            {name: int(upper_points[name][game]) for name in CATEGORIES})
+
+
+def assert_matches_score(states: List[GameState]) -> None:
+    lower_won, lower_scope, upper_scope = from_states(states)
+    packed = [state.lower_won_cards for state in states]
+    # Both forms score_batch takes, the (N, 40) array and packed CardSets.
+    for won in (lower_won, packed):
+        batch = score_batch(won, lower_scope, upper_scope)
+        for game, state in enumerate(states):
+            assert game_scores(batch, game) == score(state), game
+
+
+def test_played_games_match_score():
+    states = played_games(200)
+    assert all(state.game_over for state in states)
+    assert_matches_score(states)
+
+
+def test_unpack_matches_bits():
+    states = played_games(10)
+    won = unpack([state.lower_won_cards for state in states])
+    assert won.shape == (10, 40)
+    for row, state in zip(won, states):
+        assert from_indices(np.flatnonzero(row).tolist()) == state.lower_won_cards
+
+
+def test_two_sevens_go_to_the_sixes():
+    # Two sevens each, so the sevens are decided by the sixes: lose, draw and win.
+    sevens = from_indices([card_index(7, "Coins"), card_index(7, "Clubs")])
+    sixes = [card_index(6, suit) for suit in ("Coins", "Clubs", "Cups")]
+    states = [finished(sevens | from_indices(sixes[:held]), lower_scope=held) for held in (1, 2, 3)]
+    assert [score(state)[0]["sevens"] for state in states] == [0, 0, 1]
+    assert [score(state)[1]["sevens"] for state in states] == [1, 0, 0]
+    assert_matches_score(states)
+
+
+def test_full_run_of_coins():
+    # All ten Coins, for either player, and the run one short of it.
+    nine = COINS & ~from_indices([card_index(10, "Coins")])
+    states = [finished(COINS), finished(ALL_CARDS & ~COINS, upper_scope=2), finished(nine | SEVENS)]
+    assert_matches_score(states)
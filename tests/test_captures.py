@@ -0,0 +1,72 @@
+import random
+from typing import List
+
+from scopa import captures
+from scopa.cardset import CardSet, DECK_SIZE, EMPTY, bit, card_value, count, from_indices, indices
+from scopa.engine import calculate_options
+
+
+# The recursive generator calculate_options used before the capture index, kept as the reference it must agree with.
+def reference_valid_options(options: List[CardSet]) -> List[CardSet]:
+    if options:
+        if any(count(option) == 1 for option in options):
+            return [option for option in options if count(option) == 1]
+    return options
+
+
+def reference_options(card: int, centre_cards: CardSet) -> List[CardSet]:
+    def summation(centre: List[int], total: int):
+        def func(cards: List[int], total_num: int, partial=EMPTY, partial_sum=0):
+            if partial_sum == total_num:
+                yield partial
+            if partial_sum >= total_num:
+                return
+            for i, card in enumerate(cards):
+                remaining = cards[i + 1:]
+                yield from func(remaining, total_num, partial | bit(card), partial_sum + card_value(card))
+        return func(centre, total)
+
+    return reference_valid_options(list(summation(list(indices(centre_cards)), card_value(card))))
+
+
+def random_pairs(pairs: int, seed: int = 0):
+    # A card and a centre of up to 12 other cards, as in real games and in the worst case.
+    rng = random.Random(seed)
+    for _ in range(pairs):
+        cards = rng.sample(range(DECK_SIZE), rng.randint(1, 13))
+        yield cards[0], from_indices(cards[1:])
+
+
+def test_capture_options_match_reference():
+    for card, centre in random_pairs(20000):
+        assert set(calculate_options(card, centre)) == set(reference_options(card, centre)), (card, centre)
+
+
+def test_capture_options_match_reference_cold():
+    # The first lookup for a centre builds its entry, the rest read it.
+    for card, centre in random_pairs(2000, seed=1):
+        captures.clear_index()
+        assert set(calculate_options(card, centre)) == set(reference_options(card, centre)), (card, centre)
+
+
+def test_no_duplicate_options():
+    for card, centre in random_pairs(5000, seed=2):
+        options = calculate_options(card, centre)
+        assert len(options) == len(set(options))
+
+
+def test_empty_centre():
+    for card in range(DECK_SIZE):
+        assert calculate_options(card, EMPTY) == ()
+
+
+def test_index_keeps_recent_centres_within_limit(monkeypatch):
+    monkeypatch.setattr(captures, "CACHE_LIMIT", 8)
+    captures.clear_index()
+    hot = from_indices([0, 11])
+    for card, centre in random_pairs(100, seed=3):
+        calculate_options(card, centre)
+        calculate_options(card, hot)
+    assert len(captures._INDEX) <= 8
+    assert hot in captures._INDEX
+    captures.clear_index()
@@ -0,0 +1,12 @@
+import os
+
+# Set before pygame is imported, so the board is drawn off screen.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from scopa.benchmark import memory_check, memory_failures
+
+
+def test_restarts_do_not_leak():
+    # Memory, sprites and threads must stay level over many games with a restart between each.
+    result = memory_check()
+    assert memory_failures(result) == []